@@ -3,7 +3,7 @@ import argparse
 from pathlib import Path
 
 from IDMappedTextFileParser import parse_id_mapped_text_file
-from Utils import read_file
+from Utils import read_data_file
 
 
 class Actions:
@@ -15,8 +15,7 @@ class Actions:
 
 
     def load(self):
-        filename = Path(self.data_dir, "bin_ext", f"action_name_{self.lang_id}.txt")
-        file_content = read_file(filename)
+        file_content = read_data_file(self.data_dir, "bin_ext", f"action_name_{self.lang_id}.txt")
         self.actions = parse_id_mapped_text_file(file_content.decode("utf-8"))
 
 
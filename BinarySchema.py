@@ -0,0 +1,290 @@
+import math
+import struct
+
+from BinaryUtils import BytePtr
+
+
+FIELD_FORMATS = {
+    "byte": "B",
+    "int8": "b",
+    "uint8": "B",
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "float": "f",
+}
+
+
+def import_numpy():
+    # NumPy is optional and only needed for the columnar views
+    try:
+        import numpy
+
+    except ImportError as exception:
+        raise ImportError("Columnar views need NumPy, install it with 'pip install numpy'.") from exception
+
+    return numpy
+
+
+class Schema:
+    """
+    Compiles a list of fields into a single struct.Struct, so a whole record is read with one
+    unpack_from and written with one pack_into.
+
+    Every field is a tuple of (name, type, *args):
+        ("level", "byte")                       single value
+        ("a_action", "uint16_array", 6)         tuple of values
+        ("name", "string", 32)                  Shift-JIS string, cut at the first zero byte
+        ("dummy", "bytes_array", 2)             raw bytes
+        (None, "padding", 4)                    skipped bytes, written as zeros
+        ("info", RecordClass)                   nested record with its own SCHEMA
+    A trailing tuple repeats the field in that shape as nested lists, e.g. ("a_rate", "uint16", (8,)).
+    """
+
+    def __init__(self, fields: list[tuple], byte_order: str = "<"):
+        self.byte_order = byte_order
+        self.fields = []
+        self.layout = []
+        self.accessors = []
+        self.format = ""
+        for name, typ, *args in fields:
+            shape = args.pop() if args and isinstance(args[-1], tuple) else ()
+            field_format, decode, encode = self.compile_field(typ, *args)
+            offset = struct.calcsize(byte_order + self.format)
+            self.layout.append((name, typ, args[0] if args else 1, shape, offset))
+
+            if shape:
+                field_format *= math.prod(shape)
+                decode = self.compile_shape_decoder(decode, shape)
+                encode = self.compile_shape_encoder(encode, len(shape))
+
+            self.fields.append((name, decode, encode))
+            if name is not None:
+                self.accessors.append((name, struct.Struct(byte_order + field_format), offset, decode, encode))
+
+            self.format += field_format
+
+        self.struct = struct.Struct(byte_order + self.format)
+        self.size = self.struct.size
+
+
+    @staticmethod
+    def compile_field(typ, count: int = 1):
+        if isinstance(typ, type):
+            schema = typ.SCHEMA
+            def decode(values, i):
+                record = typ.__new__(typ)
+                return record, schema.decode_into(record, values, i)
+
+
+            def encode(value, out):
+                schema.encode_from(value, out)
+
+
+            return schema.format, decode, encode
+
+        if typ == "padding":
+            return f"{count}x", None, None
+
+        if typ in ("string", "bytes_array"):
+            if typ == "string":
+                def decode(values, i):
+                    return values[i].split(b"\x00", 1)[0].decode("shift-jis", errors="replace"), i + 1
+
+
+                def encode(value, out):
+                    out.append(value.encode("shift-jis", errors="replace"))
+
+            else:
+                def decode(values, i):
+                    return values[i], i + 1
+
+
+                def encode(value, out):
+                    out.append(bytes(value))
+
+            return f"{count}s", decode, encode
+
+        if typ.endswith("_array"):
+            field_format = FIELD_FORMATS[typ[:-len("_array")]] * count
+            def decode(values, i):
+                return tuple(values[i:i + count]), i + count
+
+
+            def encode(value, out):
+                out.extend(value)
+
+
+            return field_format, decode, encode
+
+        def decode(values, i):
+            return values[i], i + 1
+
+
+        def encode(value, out):
+            out.append(value)
+
+
+        return FIELD_FORMATS[typ], decode, encode
+
+
+    @staticmethod
+    def compile_shape_decoder(decode, shape: tuple):
+        def decode_shape(values, i, dimension=0):
+            result = []
+            for _ in range(shape[dimension]):
+                if dimension + 1 < len(shape):
+                    value, i = decode_shape(values, i, dimension + 1)
+
+                else:
+                    value, i = decode(values, i)
+
+                result.append(value)
+
+            return result, i
+
+
+        return decode_shape
+
+
+    @staticmethod
+    def compile_shape_encoder(encode, depth: int):
+        def encode_shape(value, out, dimension=0):
+            for item in value:
+                if dimension + 1 < depth:
+                    encode_shape(item, out, dimension + 1)
+
+                else:
+                    encode(item, out)
+
+
+        return encode_shape
+
+
+    def get_dtype(self):
+        numpy = import_numpy()
+
+        names = []
+        formats = []
+        offsets = []
+        for name, typ, count, shape, offset in self.layout:
+            if name is None:
+                continue
+
+            if isinstance(typ, type):
+                field_dtype = typ.SCHEMA.get_dtype()
+
+            elif typ == "string":
+                field_dtype = numpy.dtype(f"S{count}")
+
+            elif typ == "bytes_array":
+                field_dtype = numpy.dtype(("u1", (count,)))
+
+            elif typ.endswith("_array"):
+                field_dtype = numpy.dtype((self.byte_order + FIELD_FORMATS[typ[:-len("_array")]], (count,)))
+
+            else:
+                field_dtype = numpy.dtype(self.byte_order + FIELD_FORMATS[typ])
+
+            if shape:
+                field_dtype = numpy.dtype((field_dtype, shape))
+
+            names.append(name)
+            formats.append(field_dtype)
+            offsets.append(offset)
+
+        return numpy.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": self.size})
+
+
+    def decode_into(self, record, values: tuple, i: int = 0) -> int:
+        for name, decode, _ in self.fields:
+            if decode is not None:
+                value, i = decode(values, i)
+                setattr(record, name, value)
+
+        return i
+
+
+    def encode_from(self, record, out: list) -> None:
+        for name, _, encode in self.fields:
+            if encode is not None:
+                encode(getattr(record, name), out)
+
+
+    def load(self, record, byte_ptr: BytePtr) -> None:
+        self.decode_into(record, self.struct.unpack_from(byte_ptr.byte_data, byte_ptr.pos))
+        byte_ptr.skip(self.size)
+
+
+    def save(self, record, byte_ptr: BytePtr) -> None:
+        out = []
+        self.encode_from(record, out)
+        self.struct.pack_into(byte_ptr.byte_data, byte_ptr.pos, *out)
+        byte_ptr.skip(self.size)
+
+
+class Record:
+    SCHEMA: Schema = None
+
+    def __init__(self, byte_ptr: BytePtr):
+        self.ptr = byte_ptr
+
+
+    def load(self):
+        self.SCHEMA.load(self, self.ptr)
+        return self
+
+
+    def save(self):
+        self.SCHEMA.save(self, self.ptr)
+
+
+class RecordView:
+    """
+    Write-through view of one record inside a shared buffer. Every SCHEMA field becomes a property
+    that decodes the value on access and packs assignments straight back into the buffer, so
+    creating a view only costs an offset and nothing has to be saved afterwards.
+    Subclasses declare __slots__ for any additional attributes. Assignments to WATCHED_FIELDS are
+    reported to field_changed.
+    """
+
+    __slots__ = ("_buffer", "_offset")
+    SCHEMA: Schema = None
+    WATCHED_FIELDS: tuple[str, ...] = ()
+
+    def __init__(self, buffer: bytearray, offset: int):
+        self._buffer = buffer
+        self._offset = offset
+
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "SCHEMA" in cls.__dict__:
+            for name, field_struct, offset, decode, encode in cls.SCHEMA.accessors:
+                watched_name = name if name in cls.WATCHED_FIELDS else None
+                setattr(cls, name, cls.create_property(field_struct, offset, decode, encode, watched_name))
+
+
+    @staticmethod
+    def create_property(field_struct: struct.Struct, offset: int, decode, encode, watched_name: str = None) -> property:
+        def get_value(self):
+            return decode(field_struct.unpack_from(self._buffer, self._offset + offset), 0)[0]
+
+
+        def set_value(self, value):
+            old_value = get_value(self) if watched_name is not None else None
+
+            out = []
+            encode(value, out)
+            field_struct.pack_into(self._buffer, self._offset + offset, *out)
+
+            if watched_name is not None:
+                self.field_changed(watched_name, old_value, get_value(self))
+
+
+        return property(get_value, set_value)
+
+
+    def field_changed(self, name: str, old_value, new_value) -> None:
+        pass
@@ -122,7 +122,7 @@ class BytePtr:
                 num = i
                 break
         
-        data = self.byte_data[self.pos:self.pos + num]
+        data = bytes(self.byte_data[self.pos:self.pos + num])
         if utf8:
             val = data.decode("utf-8")
 
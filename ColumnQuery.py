@@ -0,0 +1,181 @@
+import ast
+import csv
+import io
+import json
+
+from collections.abc import Mapping
+
+
+ALLOWED_NODES = (
+    ast.Expression, ast.Tuple, ast.List, ast.Load,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn,
+    ast.IfExp, ast.Subscript, ast.Slice, ast.Call, ast.Name, ast.Constant,
+)
+
+ALLOWED_FUNCTIONS = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "len": len,
+    "round": round,
+}
+
+
+class QueryError(Exception):
+    pass
+
+
+class LazyColumns(Mapping):
+    def __init__(self, names: list[str], get_column, row_count: int):
+        self.names = names
+        self.get_column = get_column
+        self.row_count = row_count
+
+        self.cache = {}
+
+
+    def __getitem__(self, name: str) -> list:
+        if name not in self.names:
+            raise KeyError(name)
+
+        if name not in self.cache:
+            self.cache[name] = self.get_column(name)
+
+        return self.cache[name]
+
+
+    def __contains__(self, name) -> bool:
+        return name in self.names
+
+
+    def __iter__(self):
+        return iter(self.names)
+
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class ColumnQuery:
+    def __init__(self, columns: Mapping[str, list], row_count: int = None):
+        self.columns = columns
+        self.row_count = row_count if row_count is not None else len(next(iter(columns.values()), []))
+
+
+    def parse(self, expression: str) -> ast.Expression:
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+
+        except SyntaxError as exception:
+            raise QueryError(f"Invalid expression '{expression}': {exception.msg}") from exception
+
+        # Only plain expressions over the columns are allowed, nothing that reaches into Python itself
+        for node in ast.walk(tree):
+            if not isinstance(node, ALLOWED_NODES):
+                raise QueryError(f"'{type(node).__name__}' is not allowed in '{expression}'")
+
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in ALLOWED_FUNCTIONS and not node.keywords):
+                raise QueryError(f"Only {', '.join(ALLOWED_FUNCTIONS)} can be called in '{expression}'")
+
+            if isinstance(node, ast.Name) and node.id not in self.columns and node.id not in ALLOWED_FUNCTIONS:
+                raise QueryError(f"Unknown column '{node.id}' in '{expression}'")
+
+        return tree
+
+
+    def compile(self, tree: ast.Expression):
+        # The expression becomes a function of the columns it uses, which is then mapped over those columns
+        names = sorted({node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id in self.columns})
+        function_tree = ast.Expression(ast.Lambda(
+            ast.arguments(posonlyargs=[], args=[ast.arg(name) for name in names], kwonlyargs=[], kw_defaults=[], defaults=[]),
+            tree.body
+        ))
+        ast.fix_missing_locations(function_tree)
+        function = eval(compile(function_tree, "<query>", "eval"), {"__builtins__": ALLOWED_FUNCTIONS})
+        expression = ast.unparse(tree.body)
+
+        def evaluate_row(*values):
+            # Only arithmetic failures like a division by zero depend on the row, anything else is a mistake in the query
+            try:
+                return function(*values)
+
+            except ArithmeticError:
+                return None
+
+            except (TypeError, IndexError) as exception:
+                raise QueryError(f"Cannot evaluate '{expression}': {exception}") from exception
+
+
+        return evaluate_row, names
+
+
+    def evaluate(self, expression: str) -> list:
+        return self.evaluate_tree(self.parse(expression))
+
+
+    def evaluate_tree(self, tree: ast.Expression) -> list:
+        function, names = self.compile(tree)
+        if not names:
+            return [function()] * self.row_count
+
+        return list(map(function, *(self.columns[name] for name in names)))
+
+
+    def split(self, expression: str) -> list[tuple[str, ast.Expression]]:
+        # "a, b / c" is a tuple of expressions, every element gets its own column
+        tree = self.parse(expression)
+        if isinstance(tree.body, ast.Tuple):
+            return [(ast.unparse(element), ast.Expression(element)) for element in tree.body.elts]
+
+        return [(ast.unparse(tree.body), tree)]
+
+
+    def run(self, where: str = None, order_by: str = None, descending: bool = False, select: str = None, limit: int = None) -> tuple[list[str], list[tuple]]:
+        row_indices = range(self.row_count)
+        if where:
+            row_indices = [i for i, matches in enumerate(self.evaluate(where)) if matches]
+
+        if order_by:
+            sort_keys = list(zip(*(self.evaluate_tree(tree) for _, tree in self.split(order_by))))
+            # Rows the expression fails on are sorted to the end in both directions
+            failed = [i for i in row_indices if None in sort_keys[i]]
+            try:
+                row_indices = sorted((i for i in row_indices if None not in sort_keys[i]), key=sort_keys.__getitem__, reverse=descending) + failed
+
+            except TypeError as exception:
+                raise QueryError(f"Cannot sort by '{order_by}': {exception}") from exception
+
+        if limit is not None:
+            row_indices = row_indices[:limit]
+
+        if select:
+            selected = self.split(select)
+
+        else:
+            selected = [(name, self.parse(name)) for name in self.columns]
+
+        headers = [header for header, _ in selected]
+        result_columns = [self.evaluate_tree(tree) for _, tree in selected]
+        rows = [tuple(column[i] for column in result_columns) for i in row_indices]
+        return headers, rows
+
+
+def format_rows(headers: list[str], rows: list[tuple], output_format: str = "table") -> str:
+    if output_format == "json":
+        return json.dumps([dict(zip(headers, row)) for row in rows], indent=4, ensure_ascii=False)
+
+    if output_format == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(headers)
+        writer.writerows(rows)
+        return output.getvalue().rstrip("\n")
+
+    cells = [headers] + [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    lines = ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in cells]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(lines)
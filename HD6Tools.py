@@ -1,305 +1,1667 @@
 import argparse
+import bisect
+import fnmatch
+import hashlib
+import io
 import os
+import re
+import sqlite3
+import struct
+import sys
+import weakref
+
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from BinaryUtils import BytePtr
+from BinarySchema import Record, Schema
+from PakTools import KNOWN_FILE_EXTENSIONS, PakArchive
+from Utils import MappedFile, copy_file_range, read_file
+
+
+# Offsets are stored in 512 byte units with the lowest two bits used as flags,
+# so every offset that can be written has to be 2048 byte aligned
+DAT_ALIGNMENT = 0x800
+MAX_FILE_OFFSET = 0xFFFFFC << 9
+MAX_FILE_SIZE = 0xFFFFFF << 4
+DEFAULT_MEMORY_LIMIT = 16 * 0x100000
+
+HD6_HEADER_SIZE = 52
+MAX_NAME_CHUNKS = 0x8000
+
+FILENAME_TOKEN_PATTERN = re.compile(rb"[\x80-\xff][\x00-\xff]|[\x00-\x7f]")
+FILENAME_PATTERN = re.compile(rb"(?:[\x80-\xff][\x00-\xff]|[\x01-\x7f])*\x00")
+FILENAME_PIECE_PATTERN = re.compile(r"[^\\]*\\|[^\\_.]*[_.]|[^\\_.]+")
+
+
+def align(value: int, alignment: int) -> int:
+    return ((value + alignment - 1) // alignment) * alignment
+
+
+def set_file_entry(entry: int, offset: int, size: int) -> int:
+    # Keeps the leading 16 bits and the two flag bits of the original entry
+    return (entry & 0x3FFFF) | ((offset >> 9) << 16) | ((size >> 4) << 40)
+
+
+def get_slot_end(start_offsets: array, file_sizes: array, index: int, dat_size: int) -> int:
+    start_offset = start_offsets[index]
+    for i, offset in enumerate(start_offsets):
+        # Data shared with another entry must never be overwritten
+        if offset == start_offset and i != index and file_sizes[i] > 0:
+            return start_offset
+
+    return min((offset for offset in start_offsets if offset > start_offset), default=dat_size)
+
+
+def get_file_entry_table(file_entries: array, start_offsets: array, file_sizes: array) -> bytes:
+    file_entries = array("Q", (
+        set_file_entry(entry, start_offsets[i], file_sizes[i]) for i, entry in enumerate(file_entries)
+    ))
+    if sys.byteorder == "big":
+        file_entries.byteswap()
+
+    return file_entries.tobytes()
+
+
+def plan_dat_rewrite(replacements: dict, start_offsets: array, slot_ends: dict, dat_size: int) -> tuple[list, array, int]:
+    # Slots shared with other entries are kept, their replacements go to the end of the DAT
+    replaced_offsets = {start_offsets[target_index] for target_index in replacements}
+    shared_offsets = {offset for i, offset in enumerate(start_offsets) if i not in replacements and offset in replaced_offsets}
+    regions = sorted(
+        (start_offsets[i], slot_ends[i], i) for i in replacements if start_offsets[i] not in shared_offsets
+    )
+    appended = [i for i in replacements if start_offsets[i] in shared_offsets]
+
+    # Operations are (new file or None for the old DAT, source offset, size, destination offset)
+    operations = []
+    new_region_offsets = {}
+    region_ends = []
+    region_deltas = []
+    src_pos = 0
+    dst_pos = 0
+    for old_offset, slot_end, target_index in regions:
+        operations.append((None, src_pos, old_offset - src_pos, dst_pos))
+        dst_pos += old_offset - src_pos
+
+        new_file_path, new_size = replacements[target_index]
+        operations.append((new_file_path, 0, new_size, dst_pos))
+        new_region_offsets[target_index] = dst_pos
+        dst_pos += align(new_size, DAT_ALIGNMENT)
+
+        region_ends.append(slot_end)
+        region_deltas.append(dst_pos - slot_end)
+        src_pos = slot_end
+
+    operations.append((None, src_pos, dat_size - src_pos, dst_pos))
+    dst_pos += dat_size - src_pos
+
+    for target_index in appended:
+        dst_pos = align(dst_pos, DAT_ALIGNMENT)
+        new_file_path, new_size = replacements[target_index]
+        operations.append((new_file_path, 0, new_size, dst_pos))
+        new_region_offsets[target_index] = dst_pos
+        dst_pos += align(new_size, DAT_ALIGNMENT)
+
+    new_offsets = array("q")
+    for i, offset in enumerate(start_offsets):
+        if i in new_region_offsets:
+            new_offsets.append(new_region_offsets[i])
+
+        else:
+            # Every region ending before this entry moved it by its size difference
+            region_count = bisect.bisect_right(region_ends, offset)
+            new_offsets.append(offset + (region_deltas[region_count - 1] if region_count > 0 else 0))
+
+    return operations, new_offsets, align(dst_pos, DAT_ALIGNMENT)
+
+
+def get_digest(data: bytes, padding: int = 0) -> bytes:
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(b"\x00" * padding)
+    return digest.digest()
+
+
+def encode_name_chunk_reference(index: int) -> bytes:
+    if 0 < index < 0x80:
+        return bytes((index,))
+
+    return bytes((0x80 | (index & 0x7F), index >> 7))
+
+
+def encode_filenames(filenames: list[str]) -> tuple[bytes, bytes]:
+    # Names are split into folders and "_" / "." separated parts, runs of parts used by only
+    # one name are merged into a single chunk
+    piece_counts = {}
+    split_names = []
+    for filename in filenames:
+        pieces = [piece.encode("shift_jis") for piece in FILENAME_PIECE_PATTERN.findall(filename)]
+        split_names.append(pieces)
+        for piece in pieces:
+            piece_counts[piece] = piece_counts.get(piece, 0) + 1
+
+    chunk_counts = {}
+    encoded_names = []
+    for pieces in split_names:
+        chunks = []
+        for piece in pieces:
+            if piece_counts[piece] == 1 and chunks and piece_counts.get(chunks[-1], 1) == 1:
+                chunks[-1] += piece
+
+            else:
+                chunks.append(piece)
+
+        encoded_names.append(chunks)
+        for chunk in chunks:
+            chunk_counts[chunk] = chunk_counts.get(chunk, 0) + 1
+
+    # The most frequent chunks get the one byte references, index 0 can only be referenced with two bytes
+    chunk_list = sorted(chunk_counts, key=lambda chunk: (-chunk_counts[chunk], chunk))
+    if len(chunk_list) >= MAX_NAME_CHUNKS:
+        # Chunks beyond the limit are spelled with single byte chunks instead
+        single_bytes = sorted({bytes((byte,)) for chunk in chunk_list for byte in chunk})
+        chunk_list = [chunk for chunk in chunk_list if len(chunk) > 1][:MAX_NAME_CHUNKS - 1 - len(single_bytes)] + single_bytes
+
+    chunk_list.insert(0, b"")
+    chunk_indices = {chunk: i for i, chunk in enumerate(chunk_list)}
+
+    filename_table = bytearray()
+    for chunks in encoded_names:
+        for chunk in chunks:
+            if chunk in chunk_indices:
+                filename_table += encode_name_chunk_reference(chunk_indices[chunk])
+
+            else:
+                for byte in chunk:
+                    filename_table += encode_name_chunk_reference(chunk_indices[bytes((byte,))])
+
+        filename_table.append(0)
+
+    name_chunk_data = b"".join(chunk + b"\x00" for chunk in chunk_list)
+
+    return name_chunk_data, bytes(filename_table)
+
+
+def normalize_filename(filename: str) -> str:
+    return filename.replace("\\", os.path.sep).replace("/", os.path.sep)
+
+
+def get_glob_prefix(pattern: str) -> str:
+    match = re.search(r"[*?\[]", pattern)
+    if match is None:
+        return pattern
+
+    return pattern[:match.start()]
+
+
+class HD6Header(Record):
+    SCHEMA = Schema([
+        ("magic", "string", 3),
+        (None, "padding", 5),
+        ("name_chunk_data_size", "uint32"),
+        (None, "padding", 8),
+        ("p_filename_table", "uint32"),
+        ("filename_table_size", "uint32"),
+        (None, "padding", 8),
+        ("file_count", "uint32"),
+        ("p_file_entries", "uint32"),
+        (None, "padding", 8)
+    ])
+
+    def load(self):
+        if self.ptr.get_remaining_bytes_amount() < self.SCHEMA.size:
+            raise ValueError("Invalid HD6 file format!")
+
+        super().load()
+        if not self.magic == "HD6":
+            raise ValueError("Invalid HD6 file format!")
+
+        # The stored count includes the closing entry
+        self.file_count -= 1
+        return self
+
+
+class HD6IndexCache:
+    MAGIC = b"HD6IDX"
+    VERSION = 1
+    HEADER = struct.Struct("<6sHQQ16s6I")
+
+    def __init__(self, hd6_path: Path, cache_dir: Path = None):
+        if cache_dir is None:
+            self.cache_path = hd6_path.with_name(hd6_path.name + ".idx")
+
+        else:
+            # Archives with the same name from different folders may share one cache folder
+            path_hash = hashlib.blake2b(str(hd6_path.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+            self.cache_path = Path(cache_dir, f"{hd6_path.name}.{path_hash}.idx")
+
+
+    @staticmethod
+    def get_digest(hd6_bytes: bytes) -> bytes:
+        return hashlib.blake2b(hd6_bytes, digest_size=16).digest()
+
+
+    def load(self, hd6_extractor: "HD6Extractor", hd6_bytes: bytes) -> bool:
+        try:
+            cache_bytes = read_file(self.cache_path)
+
+        except OSError:
+            return False
+
+        if len(cache_bytes) < self.HEADER.size:
+            return False
+
+        (magic, version, hd6_size, hd6_mtime, digest, name_chunk_data_size, p_filename_table,
+         filename_table_size, file_count, p_file_entries, names_size) = self.HEADER.unpack_from(cache_bytes)
+
+        if magic != self.MAGIC or version != self.VERSION:
+            return False
+
+        stat = os.stat(hd6_extractor.hd6_path)
+        if hd6_size != stat.st_size or hd6_mtime != stat.st_mtime_ns or digest != self.get_digest(hd6_bytes):
+            return False
+
+        entries_end = self.HEADER.size + 8 * file_count
+        if len(cache_bytes) != entries_end + names_size:
+            return False
+
+        header = HD6Header(None)
+        header.name_chunk_data_size = name_chunk_data_size
+        header.p_filename_table = p_filename_table
+        header.filename_table_size = filename_table_size
+        header.file_count = file_count
+        header.p_file_entries = p_file_entries
+        hd6_extractor.header = header
+
+        hd6_extractor.file_entries = array("Q")
+        hd6_extractor.file_entries.frombytes(cache_bytes[self.HEADER.size:entries_end])
+        if sys.byteorder == "big":
+            hd6_extractor.file_entries.byteswap()
+
+        filenames = cache_bytes[entries_end:].decode("utf-8").split("\x00") if file_count > 0 else []
+        hd6_extractor.filenames = [filename.replace("\\", os.path.sep) for filename in filenames]
+        hd6_extractor.from_index_cache = True
+
+        return True
+
+
+    def save(self, hd6_extractor: "HD6Extractor", hd6_bytes: bytes) -> None:
+        header = hd6_extractor.header
+        stat = os.stat(hd6_extractor.hd6_path)
+
+        file_entries = array("Q", hd6_extractor.file_entries)
+        if sys.byteorder == "big":
+            file_entries.byteswap()
+
+        names_bytes = "\x00".join(filename.replace(os.path.sep, "\\") for filename in hd6_extractor.filenames).encode("utf-8")
+
+        cache_header = self.HEADER.pack(
+            self.MAGIC, self.VERSION, stat.st_size, stat.st_mtime_ns, self.get_digest(hd6_bytes),
+            header.name_chunk_data_size, header.p_filename_table, header.filename_table_size,
+            header.file_count, header.p_file_entries, len(names_bytes)
+        )
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            with open(temp_path, "wb") as f:
+                f.write(cache_header)
+                f.write(file_entries.tobytes())
+                f.write(names_bytes)
+
+            os.replace(temp_path, self.cache_path)
+
+        except OSError as exception:
+            print("[Warning] Could not write HD6 index cache:", exception)
+
+
+class HD6Extractor:
+    def __init__(self, hd6_path: Path, index_cache: HD6IndexCache = None):
+        self.hd6_path = hd6_path
+        self.index_cache = index_cache
+        
+        self.ptr = BytePtr()
+        self.header = None
+        self.name_chunk_data = b""
+        self.filename_table = b""
+        self.file_entries = array("Q")
+
+        self.name_chunk_lookup = {}
+        self.filename_offsets = []
+
+        self.filenames = []
+        self.from_index_cache = False
+        self.name_index = {}
+        self.sorted_names = []
+
+
+    def load(self):
+        hd6_bytes = read_file(self.hd6_path)
+
+        if self.index_cache is not None and self.index_cache.load(self, hd6_bytes):
+            return
+
+        self.ptr.set_data(hd6_bytes)
+        self.header = HD6Header(self.ptr)
+        self.header.load()
+
+        self.name_chunk_data = self.ptr.get_bytes_array(self.header.name_chunk_data_size)
+
+        position = self.ptr.pos
+        if self.header.p_filename_table > position:
+            self.ptr.skip(self.header.p_filename_table - position)
+
+        self.filename_table = self.ptr.get_bytes_array(self.header.filename_table_size)
+
+        position = self.ptr.pos
+        if self.header.p_file_entries > position:
+            self.ptr.skip(self.header.p_file_entries - position)
+
+        # Each 8 byte entry is read as one little endian 64 bit integer
+        self.file_entries = array("Q")
+        self.file_entries.frombytes(self.ptr.get_bytes_array(8 * self.header.file_count))
+        if sys.byteorder == "big":
+            self.file_entries.byteswap()
+
+        if self.index_cache is not None:
+            self.filenames = self.decode_filenames()
+            self.index_cache.save(self, hd6_bytes)
+
+
+    def parse_file_entries(self) -> tuple[array, array]:
+        # Bits 16-39 hold the offset in 512 byte units, bits 40-63 the size in 16 byte units
+        start_offset_array = array("q", [((entry >> 16) & 0xFFFFFC) << 9 for entry in self.file_entries])
+        file_size_array = array("q", [(entry >> 40) << 4 for entry in self.file_entries])
+
+        return start_offset_array, file_size_array
+
+
+    def load_name_chunks(self) -> None:
+        # Every chunk index maps to exactly one reference token, 1 byte below 0x80 and 2 bytes otherwise
+        name_chunks = self.name_chunk_data.split(b"\x00")
+        name_chunks.pop()
+
+        two_byte_tokens = [bytes((0x80 | (i & 0x7F), i >> 7)) for i in range(min(len(name_chunks), 0x8000))]
+        one_byte_tokens = [bytes((i,)) for i in range(1, min(len(name_chunks), 0x80))]
+
+        self.name_chunk_lookup = dict(zip(two_byte_tokens, name_chunks))
+        self.name_chunk_lookup.update(zip(one_byte_tokens, name_chunks[1:]))
+        self.name_chunk_lookup[b"\x00"] = b"\x00"
+
+
+    def index_filenames(self) -> None:
+        self.filename_offsets = []
+        for match in FILENAME_PATTERN.finditer(self.filename_table):
+            if len(self.filename_offsets) == self.header.file_count:
+                break
+
+            self.filename_offsets.append(match.span())
+
+
+    def resolve_filename_tokens(self, filename_table: bytes) -> bytes:
+        if not self.name_chunk_lookup:
+            self.load_name_chunks()
+
+        try:
+            return b"".join(map(self.name_chunk_lookup.__getitem__, FILENAME_TOKEN_PATTERN.findall(filename_table)))
+
+        except KeyError:
+            raise ValueError("Invalid name chunk reference in HD6 filename table!")
+
+
+    def decode_filename(self, index: int, no_system_delemiters=False) -> str:
+        # The index cache holds the decoded names but not the raw tables they come from
+        if self.from_index_cache:
+            filename = self.filenames[index]
+            return filename.replace(os.path.sep, "\\") if no_system_delemiters else filename
+
+        if not self.filename_offsets:
+            self.index_filenames()
+
+        start, end = self.filename_offsets[index]
+        name_bytes = self.resolve_filename_tokens(self.filename_table[start:end - 1])
+        decoded = name_bytes.decode("shift_jis", errors="replace")
+        if not no_system_delemiters:
+            decoded = decoded.replace("\\", os.path.sep)
+
+        return decoded
+
+
+    def decode_filenames(self, no_system_delemiters=False):
+        if self.from_index_cache:
+            if no_system_delemiters:
+                return [filename.replace(os.path.sep, "\\") for filename in self.filenames]
+
+            return list(self.filenames)
+
+        names_bytes = self.resolve_filename_tokens(self.filename_table)
+        names_bytes = names_bytes.split(b"\x00", self.header.file_count)[:self.header.file_count]
+        if not names_bytes:
+            return []
+
+        try:
+            # Shift-JIS never uses 0x00 inside a character, so all names can be decoded in one go
+            filenames = b"\x00".join(names_bytes).decode("shift_jis").split("\x00")
+
+        except UnicodeDecodeError:
+            filenames = [name_bytes.decode("shift_jis", errors="replace") for name_bytes in names_bytes]
+
+        if not no_system_delemiters:
+            filenames = [filename.replace("\\", os.path.sep) for filename in filenames]
+
+        return filenames
+
+
+    def build_index(self, filenames: list[str] = None) -> None:
+        if filenames is None:
+            # Names restored from the index cache do not need to be decoded again
+            filenames = self.filenames or self.decode_filenames()
+
+        self.filenames = filenames
+        self.name_index = {filename: i for i, filename in enumerate(filenames)}
+        self.sorted_names = sorted(self.name_index)
+
+
+    def find(self, filename: str) -> int | None:
+        return self.name_index.get(normalize_filename(filename))
+
+
+    def find_prefix(self, prefix: str) -> list[int]:
+        prefix = normalize_filename(prefix)
+        indices = []
+        position = bisect.bisect_left(self.sorted_names, prefix)
+        while position < len(self.sorted_names) and self.sorted_names[position].startswith(prefix):
+            indices.append(self.name_index[self.sorted_names[position]])
+            position += 1
+
+        return indices
+
+
+    def select(self, include: list[str] = None, exclude: list[str] = None, regex: bool = False) -> list[int]:
+        if include:
+            selected = set()
+            for pattern in include:
+                if regex:
+                    matcher = re.compile(pattern).search
+                    candidates = range(len(self.filenames))
+
+                else:
+                    pattern = normalize_filename(pattern)
+                    matcher = lambda filename, pattern=pattern: fnmatch.fnmatchcase(filename, pattern)
+                    # Only the names sharing the literal part of the glob can match
+                    candidates = self.find_prefix(get_glob_prefix(pattern))
+
+                selected.update(i for i in candidates if matcher(self.filenames[i]))
+
+        else:
+            selected = set(range(len(self.filenames)))
+
+        for pattern in exclude or []:
+            if regex:
+                matcher = re.compile(pattern).search
+
+            else:
+                pattern = normalize_filename(pattern)
+                matcher = lambda filename, pattern=pattern: fnmatch.fnmatchcase(filename, pattern)
+
+            selected = {i for i in selected if not matcher(self.filenames[i])}
+
+        return sorted(selected)
+
+
+class HD6EntryReader(io.RawIOBase):
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.pos = 0
+
+
+    def readable(self) -> bool:
+        return True
+
+
+    def seekable(self) -> bool:
+        return True
+
+
+    def tell(self) -> int:
+        return self.pos
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+
+        elif whence == io.SEEK_CUR:
+            pos = self.pos + offset
+
+        elif whence == io.SEEK_END:
+            pos = len(self.view) + offset
+
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+
+        if pos < 0:
+            raise ValueError("Negative seek position")
+
+        self.pos = pos
+        return self.pos
+
+
+    def readinto(self, buffer) -> int:
+        data = self.view[self.pos:self.pos + len(buffer)]
+        buffer[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self.view) if size is None or size < 0 else self.pos + size
+        data = bytes(self.view[self.pos:end])
+        self.pos += len(data)
+        return data
+
+
+    def getbuffer(self) -> memoryview:
+        return self.view
+
+
+    def close(self) -> None:
+        if not self.closed:
+            self.view.release()
+
+        super().close()
+
+
+class HD6Archive:
+    def __init__(self, dat_path: Path, hd6_path: Path, index_cache: HD6IndexCache = None):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+
+        self.hd6_extractor = HD6Extractor(hd6_path, index_cache)
+        self.dat_file = MappedFile(dat_path)
+        self.start_offsets = array("q")
+        self.file_sizes = array("q")
+
+        self.readers = weakref.WeakSet()
+
+
+    def load(self) -> "HD6Archive":
+        if not DatRewriter(self.dat_path, self.hd6_path).recover():
+            raise ValueError("DAT and HD6 file are out of sync after an interrupted update!")
+
+        self.hd6_extractor.load()
+        self.start_offsets, self.file_sizes = self.hd6_extractor.parse_file_entries()
+        self.hd6_extractor.build_index()
+        self.dat_file.open()
+
+        return self
+
+
+    def close(self) -> None:
+        # Readers that are still open hold views into the mapping, which has to be released first
+        for reader in list(self.readers):
+            reader.close()
+
+        self.dat_file.close()
+
+
+    def __enter__(self) -> "HD6Archive":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def __contains__(self, filename: str) -> bool:
+        return self.hd6_extractor.find(filename) is not None
+
+
+    @property
+    def filenames(self) -> list[str]:
+        return self.hd6_extractor.filenames
+
+
+    def get_index(self, filename: str) -> int:
+        index = self.hd6_extractor.find(filename)
+        if index is None:
+            raise FileNotFoundError(f"File '{filename}' not found in HD6!")
+
+        return index
+
+
+    def get_view(self, filename: str) -> memoryview:
+        index = self.get_index(filename)
+        return self.dat_file.get_view(self.start_offsets[index], self.file_sizes[index])
+
+
+    def open(self, filename: str) -> HD6EntryReader:
+        reader = HD6EntryReader(self.get_view(filename))
+        self.readers.add(reader)
+        return reader
+
+
+    def read(self, filename: str) -> bytes:
+        with self.get_view(filename) as view:
+            return bytes(view)
+
+
+class Extraction:
+    def __init__(self, dat_path: Path, hd6_path: Path, dest_folder_path: Path, workers: int = 1, quiet: bool = False,
+                 include: list[str] = None, exclude: list[str] = None, regex: bool = False, index_cache: HD6IndexCache = None):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.dest_folder_path = dest_folder_path
+        self.workers = workers
+        self.quiet = quiet
+        self.include = include
+        self.exclude = exclude
+        self.regex = regex
+        self.index_cache = index_cache
+
+
+    def perform(self) -> bool:
+        if not self.dat_path.exists():
+            print("[Error] Data file could not be found!")
+            return False
+        
+        if not self.hd6_path.exists():
+            print("[Error] HD6 file could not be found!")
+            return False
+        
+        if not DatRewriter(self.dat_path, self.hd6_path).recover():
+            return False
+
+        if not self.dest_folder_path.exists():
+            print("Destination folder does not exist. Creating it...")
+            self.dest_folder_path.mkdir(parents=True, exist_ok=True)
+
+        hd6_extractor = HD6Extractor(self.hd6_path, self.index_cache)
+        hd6_extractor.load()
+        start_offsets, file_sizes = hd6_extractor.parse_file_entries()
+        hd6_extractor.build_index()
+
+        try:
+            selected = hd6_extractor.select(self.include, self.exclude, self.regex)
+
+        except re.error as exception:
+            print("[Error] Invalid filter pattern!", exception)
+            return False
+
+        entries = [
+            (self.dest_folder_path / hd6_extractor.filenames[i], start_offsets[i], file_sizes[i])
+            for i in selected
+        ]
+
+        print("Creating directories...")
+        for directory in sorted({dest_file_path.parent for dest_file_path, _, _ in entries}):
+            directory.mkdir(parents=True, exist_ok=True)
+
+        if self.workers > 1:
+            return self.write_parallel(entries)
+
+        return self.write_serial(entries)
+
+
+    def write_serial(self, entries: list) -> bool:
+        try:
+            dat_file = MappedFile(self.dat_path).open()
+
+        except Exception as exception:
+            print("[Error] Could not open DAT file!", exception)
+            return False
+
+        with dat_file:
+            print("Writing files...")
+            for dest_file_path, start_offset, file_size in entries:
+                with dat_file.get_view(start_offset, file_size) as file_data:
+                    with open(dest_file_path, "wb") as f:
+                        f.write(file_data)
+
+                dat_file.release(start_offset, file_size)
+
+                if not self.quiet:
+                    print(f"Written: {dest_file_path}")
+
+        return True
+
+
+    def write_parallel(self, entries: list) -> bool:
+        try:
+            dat_fd = os.open(self.dat_path, os.O_RDONLY)
+
+        except Exception as exception:
+            print("[Error] Could not open DAT file!", exception)
+            return False
+
+        def write_entry(entry) -> int:
+            dest_file_path, start_offset, file_size = entry
+            dest_fd = os.open(dest_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                copy_file_range(dat_fd, dest_fd, start_offset, file_size)
+
+            finally:
+                os.close(dest_fd)
+
+            if not self.quiet:
+                # One write per line keeps the output of the worker threads from interleaving
+                print(f"Written: {dest_file_path}\n", end="")
+
+            return file_size
+
+
+        try:
+            print(f"Writing files with {self.workers} workers...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                total_size = sum(executor.map(write_entry, entries))
+
+        except Exception as exception:
+            print("[Error] Could not write file!", exception)
+            return False
+
+        finally:
+            os.close(dat_fd)
+
+        print(f"Written {len(entries)} files ({total_size} bytes).")
+        return True
+
+
+class DatRewriter:
+    def __init__(self, dat_path: Path, hd6_path: Path, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.memory_limit = memory_limit
+
+        self.journal_path = dat_path.with_name(dat_path.name + ".journal")
+
+
+    def recover(self) -> bool:
+        # Finishes a commit that was interrupted after the journal had been written
+        if not self.journal_path.exists():
+            return True
+
+        journal_folder = self.journal_path.parent
+        try:
+            moves = []
+            for line in read_file(self.journal_path).decode("utf-8").splitlines():
+                temp_name, target_name, size, mtime_ns = line.split("\t")
+                temp_path = journal_folder / temp_name
+                target_path = journal_folder / target_name
+
+                # A missing temp file is only fine if it was already moved onto its target before the interruption
+                moved = not temp_path.exists()
+                stat = (target_path if moved else temp_path).stat()
+                if stat.st_size != int(size) or stat.st_mtime_ns != int(mtime_ns):
+                    if moved:
+                        raise FileNotFoundError(f"'{temp_path}' is missing and '{target_path}' is not the updated file")
+
+                    raise ValueError(f"'{temp_path}' is not the file the journal was written for")
+
+                if not moved:
+                    moves.append((temp_path, target_path))
+
+            for temp_path, target_path in moves:
+                os.replace(temp_path, target_path)
+
+        except (OSError, ValueError) as exception:
+            print("[Error] Could not finish an interrupted DAT/HD6 update!", exception)
+            print(f"[Error] Restore the DAT and HD6 file and remove '{self.journal_path}' before running again.")
+            return False
+
+        os.remove(self.journal_path)
+        print("Finished an interrupted DAT/HD6 update.")
+        return True
+
+
+    def commit(self, operations: list, new_dat_size: int, p_file_entries: int, file_entry_table: bytes) -> None:
+        dat_temp_path = self.dat_path.with_name(self.dat_path.name + ".tmp")
+        hd6_temp_path = self.hd6_path.with_name(self.hd6_path.name + ".tmp")
+        journal_temp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        try:
+            self.write_dat(dat_temp_path, operations, new_dat_size)
+            self.write_hd6(hd6_temp_path, p_file_entries, file_entry_table)
+
+            # Paths are stored relative to the journal, so recover() finds them from any working directory
+            journal_folder = self.journal_path.parent
+            with open(journal_temp_path, "w", encoding="utf-8") as f:
+                for temp_path, target_path in ((dat_temp_path, self.dat_path), (hd6_temp_path, self.hd6_path)):
+                    stat = temp_path.stat()
+                    f.write(f"{os.path.relpath(temp_path, journal_folder)}\t{os.path.relpath(target_path, journal_folder)}\t"
+                            f"{stat.st_size}\t{stat.st_mtime_ns}\n")
+
+                f.flush()
+                os.fsync(f.fileno())
+
+        except BaseException:
+            # The temporary DAT is as large as the archive itself, so a failed rewrite must not leave it behind
+            for temp_path in (dat_temp_path, hd6_temp_path, journal_temp_path):
+                temp_path.unlink(missing_ok=True)
+
+            raise
+
+        # Until the journal exists the original files are untouched, afterwards recover() rolls forward
+        os.replace(journal_temp_path, self.journal_path)
+        os.replace(dat_temp_path, self.dat_path)
+        os.replace(hd6_temp_path, self.hd6_path)
+        os.remove(self.journal_path)
+
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(self.dat_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+
+            finally:
+                os.close(dir_fd)
+
+
+    def write_dat(self, temp_path: Path, operations: list, new_dat_size: int) -> None:
+        src_fd = os.open(self.dat_path, os.O_RDONLY)
+        try:
+            dst_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                for source, src_offset, size, dst_offset in operations:
+                    if source is None:
+                        copy_file_range(src_fd, dst_fd, src_offset, size, dst_offset, self.memory_limit)
+
+                    else:
+                        self.write_new_file(dst_fd, source, size, dst_offset)
+
+                os.ftruncate(dst_fd, new_dat_size)
+                os.fsync(dst_fd)
+
+            finally:
+                os.close(dst_fd)
+
+        finally:
+            os.close(src_fd)
+
+
+    def write_new_file(self, dst_fd: int, new_file_path: Path, new_size: int, dst_offset: int) -> None:
+        # The padding up to new_size stays a zero filled gap of the freshly created file
+        src_fd = os.open(new_file_path, os.O_RDONLY)
+        try:
+            copy_file_range(src_fd, dst_fd, 0, new_size, dst_offset, self.memory_limit)
+
+        finally:
+            os.close(src_fd)
+
+
+    def write_hd6(self, temp_path: Path, p_file_entries: int, file_entry_table: bytes) -> None:
+        hd6_bytes = bytearray(read_file(self.hd6_path))
+        hd6_bytes[p_file_entries:p_file_entries + len(file_entry_table)] = file_entry_table
+
+        with open(temp_path, "wb") as f:
+            f.write(hd6_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class NestedExtraction(Extraction):
+    CONTAINER_EXTENSIONS = {extension for extension, _ in KNOWN_FILE_EXTENSIONS}
+
+    def write_serial(self, entries: list) -> bool:
+        return self.write_entries(entries, 1)
+
+
+    def write_parallel(self, entries: list) -> bool:
+        return self.write_entries(entries, self.workers)
+
+
+    def write_entries(self, entries: list, workers: int) -> bool:
+        try:
+            dat_file = MappedFile(self.dat_path).open()
+
+        except Exception as exception:
+            print("[Error] Could not open DAT file!", exception)
+            return False
+
+        def write_entry(entry) -> int:
+            dest_file_path, start_offset, file_size = entry
+            file_data = dat_file.get_view(start_offset, file_size)
+            try:
+                return self.write_file(dest_file_path, file_data)
+
+            finally:
+                # A failed release must not replace the error of the write
+                try:
+                    file_data.release()
+
+                except BufferError:
+                    pass
+
+                dat_file.release(start_offset, file_size)
+
+
+        try:
+            with dat_file:
+                print(f"Writing files with {workers} workers...")
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    file_count = sum(executor.map(write_entry, entries))
+
+        except Exception as exception:
+            print("[Error] Could not write file!", exception)
+            return False
+
+        print(f"Written {file_count} files.")
+        return True
+
+
+    def write_file(self, dest_file_path: Path, file_data: memoryview, is_inner_file: bool = False) -> int:
+        # Containers are unpacked in memory into a folder named like the container
+        if dest_file_path.suffix[1:].lower() in self.CONTAINER_EXTENSIONS:
+            try:
+                inner_files = [(file_header.file_name, inner_data) for file_header, inner_data in PakArchive(data=file_data).load()]
+
+            except struct.error:
+                inner_files = []
+
+            if inner_files:
+                dest_file_path.mkdir(parents=True, exist_ok=True)
+                file_count = 0
+                for inner_name, inner_data in inner_files:
+                    inner_path = Path(normalize_filename(inner_name).lstrip(os.path.sep))
+                    if ".." in inner_path.parts:
+                        raise ValueError(f"Invalid filename '{inner_name}' in container '{dest_file_path}'!")
+
+                    file_count += self.write_file(dest_file_path / inner_path, inner_data, True)
+
+                return file_count
+
+        # Files inside containers may bring their own subfolders
+        if is_inner_file:
+            dest_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(dest_file_path, "wb") as f:
+            f.write(file_data)
+
+        if not self.quiet:
+            # One write per line keeps the output of the worker threads from interleaving
+            print(f"Written: {dest_file_path}\n", end="")
+
+        return 1
+
+
+class Replacement:
+    def __init__(self, dat_path: Path, hd6_path: Path, target_filename: str, new_file_path: Path, index_cache: HD6IndexCache = None,
+                 rewrite: bool = False, memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.target_filename = target_filename
+        self.new_file_path = new_file_path
+        self.index_cache = index_cache
+        self.rewrite = rewrite
+        self.memory_limit = memory_limit
+
+    def perform(self) -> bool:
+        if not self.dat_path.exists():
+            print("[Error] DAT file not found!")
+            return False
+        
+        if not self.hd6_path.exists():
+            print("[Error] HD6 file not found!")
+            return False
+        
+        if not self.new_file_path.exists():
+            print("[Error] New file not found!")
+            return False
+
+        dat_rewriter = DatRewriter(self.dat_path, self.hd6_path, self.memory_limit)
+        if not dat_rewriter.recover():
+            return False
+        
+        hd6_extractor = HD6Extractor(self.hd6_path, self.index_cache)
+        hd6_extractor.load()
+        start_offsets, file_sizes = hd6_extractor.parse_file_entries()
+        hd6_extractor.build_index()
+
+        target_index = hd6_extractor.find(self.target_filename)
+        if target_index is None:
+            print(f"[Error] Target filename '{self.target_filename}' not found in HD6!")
+            return False
+
+        old_offset = start_offsets[target_index]
+        old_size = file_sizes[target_index]
+        print(f"Replacing file '{self.target_filename}' at offset {old_offset} with size {old_size}")
+
+        try:
+            new_data = read_file(self.new_file_path)
+
+        except Exception as exception:
+            print("[Error] Error reading new file:", exception)
+            return False
+
+        new_size = len(new_data)
+        if new_size % 16 != 0:
+            padded_size = ((new_size + 15) // 16) * 16
+            new_data += b"\x00" * (padded_size - new_size)
+            new_size = padded_size
+
+        print(f"New file size (aligned): {new_size}")
+
+        if new_size > MAX_FILE_SIZE:
+            print("[Error] New file is too large for an HD6 entry!")
+            return False
+
+        try:
+            dat_size = self.dat_path.stat().st_size
+
+        except Exception as exception:
+            print("[Error] Error reading DAT file:", exception)
+            return False
+
+        if old_offset + old_size > dat_size:
+            print("[Error]  Target file range exceeds DAT file size!")
+            return False
+
+        slot_end = get_slot_end(start_offsets, file_sizes, target_index, dat_size)
+        if new_size <= slot_end - old_offset:
+            new_offset = old_offset
+            print("New file fits into the old slot, overwriting it in place.")
+
+        elif self.rewrite:
+            print("New file does not fit into the old slot, rewriting the DAT file...")
+            replacements = {target_index: (self.new_file_path, new_size)}
+            operations, new_offsets, new_dat_size = plan_dat_rewrite(replacements, start_offsets, {target_index: slot_end}, dat_size)
+            if new_dat_size > MAX_FILE_OFFSET:
+                print("[Error] DAT file would become too large for HD6 offsets!")
+                return False
+
+            new_sizes = array("q", file_sizes)
+            new_sizes[target_index] = new_size
+            try:
+                dat_rewriter.commit(
+                    operations, new_dat_size, hd6_extractor.header.p_file_entries,
+                    get_file_entry_table(hd6_extractor.file_entries, new_offsets, new_sizes)
+                )
+
+            except Exception as exception:
+                print("[Error] Error rewriting DAT and HD6 file:", exception)
+                return False
+
+            print("DAT and HD6 file updated.")
+            return True
+
+        else:
+            new_offset = align(dat_size, DAT_ALIGNMENT)
+            if new_offset > MAX_FILE_OFFSET:
+                print("[Error] DAT file is too large to append the new file!")
+                return False
+
+            print(f"New file does not fit into the old slot, appending it at offset {new_offset}.")
+
+        try:
+            dat_fd = os.open(self.dat_path, os.O_RDWR)
+            try:
+                os.pwrite(dat_fd, new_data, new_offset)
+                if new_offset != old_offset:
+                    os.ftruncate(dat_fd, align(new_offset + new_size, DAT_ALIGNMENT))
 
-from pathlib import Path
+            finally:
+                os.close(dat_fd)
 
-from BinaryUtils import BytePtr
-from Utils import read_file
+        except Exception as exception:
+            print("[Error] Error writing DAT file:", exception)
+            return False
+        
+        print("DAT file updated.")
 
+        entry = set_file_entry(hd6_extractor.file_entries[target_index], new_offset, new_size)
+        try:
+            hd6_fd = os.open(self.hd6_path, os.O_RDWR)
+            try:
+                os.pwrite(hd6_fd, struct.pack("<Q", entry), hd6_extractor.header.p_file_entries + target_index * 8)
 
-def uint16_to_int(bytes_array: bytes) -> int:
-    return (bytes_array[0] & 0xFF) | ((bytes_array[1] & 0xFF) << 8)
+            finally:
+                os.close(hd6_fd)
+
+        except Exception as exception:
+            print("[Error] Error writing HD6 file:", exception)
+            return False
+        
+        print("HD6 file updated.")
 
+        return True
 
-def uint24_to_int(bytes_array: bytes) -> int:
-    return (bytes_array[0] & 0xFF) | ((bytes_array[1] & 0xFF) << 8) | ((bytes_array[2] & 0xFF) << 16)
 
+class BatchReplacement:
+    def __init__(self, dat_path: Path, hd6_path: Path, manifest_path: Path, index_cache: HD6IndexCache = None,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.manifest_path = manifest_path
+        self.index_cache = index_cache
+        self.memory_limit = memory_limit
 
-def get_name_chunk_data_offset_array(name_chunk_data: bytes) -> list:
-    offsets = [0]
-    for i, byte in enumerate(name_chunk_data):
-        if byte == 0:
-            offsets.append(i + 1)
 
-    return offsets
+    def load_manifest(self) -> list[tuple[str, Path]]:
+        # One "archive path<TAB>local file" pair per line, local paths are relative to the manifest
+        pairs = []
+        for line in read_file(self.manifest_path).decode("utf-8").splitlines():
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
 
+            if "\t" in line:
+                target_filename, new_file = line.split("\t", 1)
 
-def align(value: int, alignment: int) -> int:
-    return ((value + alignment - 1) // alignment) * alignment
+            else:
+                target_filename, new_file = line.split(None, 1)
 
+            pairs.append((target_filename.strip(), self.manifest_path.parent / new_file.strip()))
 
-class HD6Header:
-    def __init__(self, ptr: BytePtr):
-        self.ptr = ptr
+        return pairs
 
 
-    def load(self):
-        magic = self.ptr.get_string(3)
-        if not magic == "HD6":
-            raise ValueError("Invalid HD6 file format!")
+    def perform(self) -> bool:
+        if not self.dat_path.exists():
+            print("[Error] DAT file not found!")
+            return False
         
-        self.ptr.skip(5)
-        self.name_chunk_data_size = self.ptr.get_uint32()
-        self.ptr.skip(8)
-        self.p_filename_table = self.ptr.get_uint32()
-        self.filename_table_size = self.ptr.get_uint32()
-        self.ptr.skip(8)
-        self.file_count = self.ptr.get_uint32() - 1
-        self.p_file_entries = self.ptr.get_uint32()
-        self.ptr.skip(8)
+        if not self.hd6_path.exists():
+            print("[Error] HD6 file not found!")
+            return False
 
+        try:
+            pairs = self.load_manifest()
 
-class HD6Extractor:
-    def __init__(self, hd6_path: Path):
-        self.hd6_path = hd6_path
-        
-        self.ptr = BytePtr()
-        self.header = None
-        self.name_chunk_data = b""
-        self.filename_table = b""
-        self.file_entries = []
+        except Exception as exception:
+            print("[Error] Error reading manifest:", exception)
+            return False
 
+        return self.replace_files(pairs)
 
-    def load(self):
-        hd6_bytes = read_file(self.hd6_path)
 
-        self.ptr.set_data(hd6_bytes)
-        self.header = HD6Header(self.ptr)
-        self.header.load()
+    def replace_files(self, pairs: list[tuple[str, Path]], hd6_extractor: HD6Extractor = None) -> bool:
+        dat_rewriter = DatRewriter(self.dat_path, self.hd6_path, self.memory_limit)
+        if not dat_rewriter.recover():
+            return False
 
-        self.name_chunk_data = self.ptr.get_bytes_array(self.header.name_chunk_data_size)
+        if hd6_extractor is None:
+            hd6_extractor = HD6Extractor(self.hd6_path, self.index_cache)
+            hd6_extractor.load()
+            hd6_extractor.build_index()
 
-        position = self.ptr.pos
-        if self.header.p_filename_table > position:
-            self.ptr.skip(self.header.p_filename_table - position)
+        start_offsets, file_sizes = hd6_extractor.parse_file_entries()
 
-        self.filename_table = self.ptr.get_bytes_array(self.header.filename_table_size)
+        replacements = {}
+        for target_filename, new_file_path in pairs:
+            target_index = hd6_extractor.find(target_filename)
+            if target_index is None:
+                print(f"[Error] Target filename '{target_filename}' not found in HD6!")
+                return False
 
-        position = self.ptr.pos
-        if self.header.p_file_entries > position:
-            self.ptr.skip(self.header.p_file_entries - position)
+            if target_index in replacements:
+                print(f"[Error] Target filename '{target_filename}' is listed more than once!")
+                return False
 
-        for _ in range(self.header.file_count):
-            entry = self.ptr.get_bytes_array(8)
-            self.file_entries.append(entry)
+            if not new_file_path.exists():
+                print(f"[Error] New file '{new_file_path}' not found!")
+                return False
 
+            new_size = align(new_file_path.stat().st_size, 16)
+            if new_size > MAX_FILE_SIZE:
+                print(f"[Error] New file '{new_file_path}' is too large for an HD6 entry!")
+                return False
 
-    def parse_file_entries(self):
-        start_offset_array = []
-        file_size_array = []
-        for entry in self.file_entries:
-            ptr_entry = BytePtr()
-            ptr_entry.set_data(entry)
-            ptr_entry.skip(2)
-            bytes_array = ptr_entry.get_bytes_array(3)
-            start_offset = (uint24_to_int(bytes_array) & 0xFFFFFC) << 9
-            start_offset_array.append(start_offset)
+            replacements[target_index] = (new_file_path, new_size)
 
-            bytes_array = ptr_entry.get_bytes_array(3)
-            file_size = uint24_to_int(bytes_array) << 4
-            file_size_array.append(file_size)
+        print(f"Replacing {len(replacements)} files...")
 
-        return start_offset_array, file_size_array
+        dat_size = self.dat_path.stat().st_size
+        slot_ends = {
+            target_index: get_slot_end(start_offsets, file_sizes, target_index, dat_size)
+            for target_index in replacements
+        }
 
+        new_sizes = array("q", file_sizes)
+        for target_index, (_, new_size) in replacements.items():
+            new_sizes[target_index] = new_size
 
-    def decode_filenames(self, no_system_delemiters=False):
-        offsets = get_name_chunk_data_offset_array(self.name_chunk_data)
-        filenames = []
+        if all(new_size <= slot_ends[i] - start_offsets[i] for i, (_, new_size) in replacements.items()):
+            print("All new files fit into their old slots, overwriting them in place.")
+            return self.write_in_place(hd6_extractor, replacements, start_offsets, new_sizes)
+
+        print("Rewriting DAT file...")
+        operations, new_offsets, new_dat_size = plan_dat_rewrite(replacements, start_offsets, slot_ends, dat_size)
+        if new_dat_size > MAX_FILE_OFFSET:
+            print("[Error] DAT file would become too large for HD6 offsets!")
+            return False
 
-        ptr_file_table = BytePtr()
-        ptr_file_table.set_data(self.filename_table)
+        try:
+            dat_rewriter.commit(
+                operations, new_dat_size, hd6_extractor.header.p_file_entries,
+                get_file_entry_table(hd6_extractor.file_entries, new_offsets, new_sizes)
+            )
 
-        for _ in range(self.header.file_count):
-            name_bytes = bytearray()
-            while True:
-                byte = ptr_file_table.get_byte()
-                if byte == 0:
-                    break
+        except Exception as exception:
+            print("[Error] Error rewriting DAT and HD6 file:", exception)
+            return False
 
-                if byte & 0x80:
-                    byte2 = ptr_file_table.get_byte()
-                    short_index = uint16_to_int(bytes([byte, byte2]))
-                    factor = byte2 + 1
-                    final_index = short_index - (factor * 0x80)
+        print("DAT and HD6 file updated.")
 
-                else:
-                    final_index = byte
+        return True
 
-                current_offset = offsets[final_index]
-                next_offset = offsets[final_index + 1]
-                chunk_size = next_offset - current_offset - 1
-                name_bytes.extend(self.name_chunk_data[current_offset:current_offset + chunk_size])
 
+    def write_in_place(self, hd6_extractor: HD6Extractor, replacements: dict, start_offsets: array, new_sizes: array) -> bool:
+        try:
+            dat_fd = os.open(self.dat_path, os.O_RDWR)
             try:
-                decoded = name_bytes.decode("shift_jis")
+                for target_index, (new_file_path, new_size) in replacements.items():
+                    new_data = read_file(new_file_path)
+                    os.pwrite(dat_fd, new_data + b"\x00" * (new_size - len(new_data)), start_offsets[target_index])
 
-            except Exception:
-                decoded = name_bytes.decode("shift_jis", errors="replace")
-            
-            if not no_system_delemiters:
-                decoded = decoded.replace("\\", os.path.sep)
+            finally:
+                os.close(dat_fd)
+
+        except Exception as exception:
+            print("[Error] Error writing DAT file:", exception)
+            return False
 
-            filenames.append(decoded)
+        print("DAT file updated.")
 
-        return filenames
+        try:
+            hd6_fd = os.open(self.hd6_path, os.O_RDWR)
+            try:
+                file_entry_table = get_file_entry_table(hd6_extractor.file_entries, start_offsets, new_sizes)
+                os.pwrite(hd6_fd, file_entry_table, hd6_extractor.header.p_file_entries)
 
+            finally:
+                os.close(hd6_fd)
 
-class Extraction:
-    def __init__(self, dat_path: Path, hd6_path: Path, dest_folder_path: Path):
+        except Exception as exception:
+            print("[Error] Error writing HD6 file:", exception)
+            return False
+
+        print("HD6 file updated.")
+
+        return True
+
+
+class Synchronization:
+    def __init__(self, dat_path: Path, hd6_path: Path, source_folder_path: Path, index_cache: HD6IndexCache = None,
+                 memory_limit: int = DEFAULT_MEMORY_LIMIT):
         self.dat_path = dat_path
         self.hd6_path = hd6_path
-        self.dest_folder_path = dest_folder_path
+        self.source_folder_path = source_folder_path
+        self.index_cache = index_cache
+        self.memory_limit = memory_limit
+
+
+    def get_changed_files(self, hd6_extractor: HD6Extractor, start_offsets: array, file_sizes: array) -> list[tuple[str, Path]]:
+        changed_files = []
+        with MappedFile(self.dat_path).open() as dat_file:
+            for i, filename in enumerate(hd6_extractor.filenames):
+                local_path = self.source_folder_path / filename
+                # extract --nested leaves a folder in place of every unpacked container
+                if not local_path.is_file():
+                    continue
+
+                try:
+                    local_size = local_path.stat().st_size
+
+                except OSError:
+                    continue
+
+                # Files are stored padded to 16 bytes, so only a different padded size is a sure change
+                if align(local_size, 16) != file_sizes[i]:
+                    changed_files.append((filename, local_path))
+                    continue
+
+                with dat_file.get_view(start_offsets[i], file_sizes[i]) as archive_data:
+                    archive_digest = get_digest(archive_data)
+
+                if get_digest(read_file(local_path), file_sizes[i] - local_size) != archive_digest:
+                    changed_files.append((filename, local_path))
+
+        return changed_files
 
 
     def perform(self) -> bool:
         if not self.dat_path.exists():
-            print("[Error] Data file could not be found!")
+            print("[Error] DAT file not found!")
             return False
         
         if not self.hd6_path.exists():
-            print("[Error] HD6 file could not be found!")
+            print("[Error] HD6 file not found!")
+            return False
+
+        if not self.source_folder_path.is_dir():
+            print("[Error] Source folder not found!")
+            return False
+
+        batch_replacement = BatchReplacement(self.dat_path, self.hd6_path, None, self.index_cache, self.memory_limit)
+        if not DatRewriter(self.dat_path, self.hd6_path, self.memory_limit).recover():
             return False
-        
-        if not self.dest_folder_path.exists():
-            print("Destination folder does not exist. Creating it...")
-            self.dest_folder_path.mkdir(parents=True, exist_ok=True)
 
-        hd6_extractor = HD6Extractor(self.hd6_path)
+        hd6_extractor = HD6Extractor(self.hd6_path, self.index_cache)
         hd6_extractor.load()
         start_offsets, file_sizes = hd6_extractor.parse_file_entries()
-        filenames = hd6_extractor.decode_filenames()
+        hd6_extractor.build_index()
 
+        print("Comparing files...")
         try:
-            dat_bytes = read_file(self.dat_path)
+            changed_files = self.get_changed_files(hd6_extractor, start_offsets, file_sizes)
 
         except Exception as exception:
-            print("[Error] Could not open DAT file!", exception)
+            print("[Error] Error comparing files:", exception)
             return False
 
-        dat_byte_ptr = BytePtr()
-        dat_byte_ptr.set_data(dat_bytes)
+        if not changed_files:
+            print("No changed files found.")
+            return True
 
-        print("Writing files...")
-        for i, filename in enumerate(filenames):
-            start_offset = start_offsets[i]
-            file_size = file_sizes[i]
-            dat_byte_ptr.pos = start_offset
-            file_data = dat_byte_ptr.get_bytes_array(file_size)
-            dest_file_path = self.dest_folder_path / filename
-            dest_file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(dest_file_path, "wb") as f:
-                f.write(file_data)
+        for filename, _ in changed_files:
+            print(f"Changed: {filename}")
 
-            print(f"Written: {dest_file_path}")
+        return batch_replacement.replace_files(changed_files, hd6_extractor)
 
-        return True
 
+class IntegrityManifest:
+    HEADER_LINE = "# HD6 manifest v1: digest, offset, size, filename"
 
-class Replacement:
-    def __init__(self, dat_path: Path, hd6_path: Path, target_filename: str, new_file_path: Path):
+    def __init__(self, dat_path: Path, hd6_path: Path, manifest_path: Path, workers: int = None, index_cache: HD6IndexCache = None):
         self.dat_path = dat_path
         self.hd6_path = hd6_path
-        self.target_filename = target_filename
-        self.new_file_path = new_file_path
+        self.manifest_path = manifest_path
+        self.workers = workers or os.cpu_count()
+        self.index_cache = index_cache
 
-    def perform(self) -> bool:
+
+    def hash_entries(self, archive: HD6Archive) -> list[bytes]:
+        def hash_entry(index: int) -> bytes:
+            with archive.dat_file.get_view(archive.start_offsets[index], archive.file_sizes[index]) as view:
+                return get_digest(view)
+
+
+        # hashlib releases the GIL while hashing, so the threads really run in parallel
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(hash_entry, range(len(archive.filenames))))
+
+
+    def get_entries(self) -> dict[str, tuple[int, int, bytes]] | None:
         if not self.dat_path.exists():
             print("[Error] DAT file not found!")
-            return False
+            return None
         
         if not self.hd6_path.exists():
             print("[Error] HD6 file not found!")
+            return None
+
+        with HD6Archive(self.dat_path, self.hd6_path, self.index_cache).load() as archive:
+            print(f"Hashing {len(archive.filenames)} files with {self.workers} workers...")
+            digests = self.hash_entries(archive)
+
+            return {
+                filename.replace(os.path.sep, "\\"): (archive.start_offsets[i], archive.file_sizes[i], digests[i])
+                for i, filename in enumerate(archive.filenames)
+            }
+
+
+    def create(self) -> bool:
+        entries = self.get_entries()
+        if entries is None:
             return False
-        
-        if not self.new_file_path.exists():
-            print("[Error] New file not found!")
-            return False
-        
-        hd6_extractor = HD6Extractor(self.hd6_path)
-        hd6_extractor.load()
-        start_offsets, file_sizes = hd6_extractor.parse_file_entries()
-        filenames = hd6_extractor.decode_filenames()
 
         try:
-            target_index = filenames.index(self.target_filename)
+            with open(self.manifest_path, "w", encoding="utf-8") as f:
+                f.write(self.HEADER_LINE + "\n")
+                for filename, (offset, size, digest) in entries.items():
+                    f.write(f"{digest.hex()}\t{offset}\t{size}\t{filename}\n")
 
-        except ValueError:
-            print(f"[Error] Target filename '{self.target_filename}' not found in HD6!")
+        except Exception as exception:
+            print("[Error] Error writing manifest:", exception)
             return False
 
-        old_offset = start_offsets[target_index]
-        old_size = file_sizes[target_index]
-        print(f"Replacing file '{self.target_filename}' at offset {old_offset} with size {old_size}")
+        print(f"Manifest with {len(entries)} files written.")
+        return True
+
 
+    def load(self) -> dict[str, tuple[int, int, bytes]]:
+        entries = {}
+        for line in read_file(self.manifest_path).decode("utf-8").splitlines():
+            if line == "" or line.startswith("#"):
+                continue
+
+            digest, offset, size, filename = line.split("\t", 3)
+            entries[filename] = (int(offset), int(size), bytes.fromhex(digest))
+
+        return entries
+
+
+    def verify(self) -> bool:
         try:
-            new_data = read_file(self.new_file_path)
+            expected_entries = self.load()
 
         except Exception as exception:
-            print("[Error] Error reading new file:", exception)
+            print("[Error] Error reading manifest:", exception)
             return False
 
-        new_size = len(new_data)
-        if new_size % 16 != 0:
-            padded_size = ((new_size + 15) // 16) * 16
-            new_data += b"\x00" * (padded_size - new_size)
-            new_size = padded_size
+        entries = self.get_entries()
+        if entries is None:
+            return False
 
-        print(f"New file size (aligned): {new_size}")
+        difference_count = 0
+        for filename, (offset, size, digest) in entries.items():
+            if filename not in expected_entries:
+                print(f"Added: {filename}")
+                difference_count += 1
+                continue
 
-        delta = new_size - old_size
-        print(f"Size difference (delta): {delta}")
+            expected_offset, expected_size, expected_digest = expected_entries[filename]
+            if size != expected_size or digest != expected_digest:
+                print(f"Changed: {filename}")
+                difference_count += 1
 
-        try:
-            dat_bytes = bytearray(read_file(self.dat_path))
+            elif offset != expected_offset:
+                print(f"Moved: {filename} ({expected_offset} -> {offset})")
+                difference_count += 1
 
-        except Exception as exception:
-            print("[Error] Error reading DAT file:", exception)
+        for filename in expected_entries.keys() - entries.keys():
+            print(f"Missing: {filename}")
+            difference_count += 1
+
+        if difference_count > 0:
+            print(f"{difference_count} of {len(entries)} files differ from the manifest.")
             return False
 
-        if old_offset + old_size > len(dat_bytes):
-            print("[Error]  Target file range exceeds DAT file size!")
+        print(f"All {len(entries)} files match the manifest.")
+        return True
+
+
+class CatalogIndex:
+    CONTAINER_EXTENSIONS = {extension for extension, _ in KNOWN_FILE_EXTENSIONS}
+
+    def __init__(self, dat_path: Path, hd6_path: Path, database_path: Path, workers: int = None, index_cache: HD6IndexCache = None):
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.database_path = database_path
+        self.workers = workers or os.cpu_count()
+        self.index_cache = index_cache
+
+
+    def get_rows(self, container: str, filename: str, offset: int, data: memoryview) -> list[tuple]:
+        extension = os.path.splitext(filename)[1][1:].lower()
+        rows = [(container, filename, extension, offset, len(data), get_digest(data).hex())]
+
+        # Containers are followed recursively, their files get the container path joined with "/"
+        if extension in self.CONTAINER_EXTENSIONS:
+            try:
+                pak_archive = PakArchive(data=data).load()
+
+            except struct.error:
+                return rows
+
+            inner_container = filename if container == "" else f"{container}/{filename}"
+            for header_pos, file_header in pak_archive.headers:
+                inner_offset = header_pos + file_header.relative_file_offset
+                rows += self.get_rows(
+                    inner_container, file_header.file_name, offset + inner_offset,
+                    data[inner_offset:inner_offset + file_header.file_size]
+                )
+
+        return rows
+
+
+    def perform(self) -> bool:
+        if not self.dat_path.exists():
+            print("[Error] DAT file not found!")
+            return False
+        
+        if not self.hd6_path.exists():
+            print("[Error] HD6 file not found!")
             return False
 
-        new_dat_bytes = dat_bytes[:old_offset] + new_data + dat_bytes[old_offset+old_size:]
+        with HD6Archive(self.dat_path, self.hd6_path, self.index_cache).load() as archive:
+            def catalog_entry(index: int) -> list[tuple]:
+                filename = archive.filenames[index].replace(os.path.sep, "\\")
+                with archive.dat_file.get_view(archive.start_offsets[index], archive.file_sizes[index]) as view:
+                    return self.get_rows("", filename, archive.start_offsets[index], view)
+
+
+            print(f"Cataloging {len(archive.filenames)} files with {self.workers} workers...")
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    entry_rows = list(executor.map(catalog_entry, range(len(archive.filenames))))
+
+            except Exception as exception:
+                print("[Error] Error reading archive:", exception)
+                return False
+
+        archive_path = str(self.hd6_path.resolve())
+        row_count = 0
         try:
-            with open(self.dat_path, "wb") as f:
-                f.write(new_dat_bytes)
+            connection = sqlite3.connect(self.database_path)
+            try:
+                with connection:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS files ("
+                        "archive TEXT NOT NULL, container TEXT NOT NULL, name TEXT NOT NULL, extension TEXT NOT NULL, "
+                        "offset INTEGER NOT NULL, size INTEGER NOT NULL, hash TEXT NOT NULL)"
+                    )
+                    connection.execute("CREATE INDEX IF NOT EXISTS files_name ON files (name)")
+                    connection.execute("CREATE INDEX IF NOT EXISTS files_extension ON files (extension)")
+
+                    # Indexing an archive again replaces its old rows
+                    connection.execute("DELETE FROM files WHERE archive = ?", (archive_path,))
+                    for rows in entry_rows:
+                        connection.executemany(
+                            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", [(archive_path,) + row for row in rows]
+                        )
+                        row_count += len(rows)
+
+            finally:
+                connection.close()
+
+        except sqlite3.Error as exception:
+            print("[Error] Error writing catalog:", exception)
+            return False
 
-        except Exception as exception:
-            print("[Error] Error writing DAT file:", exception)
+        print(f"Catalog with {row_count} files written.")
+        return True
+
+
+class HD6Builder:
+    def __init__(self, source_folder_path: Path, dat_path: Path, hd6_path: Path, template_hd6_path: Path = None):
+        self.source_folder_path = source_folder_path
+        self.dat_path = dat_path
+        self.hd6_path = hd6_path
+        self.template_hd6_path = template_hd6_path
+
+
+    def collect_files(self) -> list[str]:
+        filenames = []
+        for root, dirs, files in os.walk(self.source_folder_path):
+            dirs.sort()
+            relative_root = Path(root).relative_to(self.source_folder_path)
+            for file in sorted(files):
+                filenames.append("\\".join((relative_root / file).parts))
+
+        return filenames
+
+
+    def perform(self) -> bool:
+        if not self.source_folder_path.is_dir():
+            print("[Error] Source folder not found!")
             return False
-        
-        print("DAT file updated.")
 
+        filenames = self.collect_files()
+        header_bytes = bytearray(HD6_HEADER_SIZE)
+        header_bytes[0:3] = b"HD6"
+        template_entries = {}
+
+        if self.template_hd6_path is not None:
+            # Unknown header fields, the order and the leading entry bits are taken over from the template
+            template = HD6Extractor(self.template_hd6_path)
+            template.load()
+            header_bytes[:] = read_file(self.template_hd6_path)[:HD6_HEADER_SIZE]
+            template_names = template.decode_filenames(no_system_delemiters=True)
+            template_entries = {filename: template.file_entries[i] for i, filename in enumerate(template_names)}
+
+            file_set = set(filenames)
+            filenames = [filename for filename in template_names if filename in file_set] + \
+                        [filename for filename in filenames if filename not in template_entries]
+
+        print(f"Encoding {len(filenames)} filenames...")
         try:
-            hd6_bytes = bytearray(read_file(self.hd6_path))
+            name_chunk_data, filename_table = encode_filenames(filenames)
 
-        except Exception as exception:
-            print("[Error] Error reading HD6 file for update:", exception)
+        except UnicodeEncodeError as exception:
+            print("[Error] Filename cannot be encoded as Shift-JIS!", exception)
             return False
 
-        file_entries_offset = hd6_extractor.header.p_file_entries
-        file_count = hd6_extractor.header.file_count
+        print("Writing DAT file...")
+        file_entries = array("Q")
+        temp_dat_path = self.dat_path.with_name(self.dat_path.name + ".tmp")
+        try:
+            dat_fd = os.open(temp_dat_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                dat_size = 0
+                for filename in filenames:
+                    source_path = self.source_folder_path.joinpath(*filename.split("\\"))
+                    file_size = align(source_path.stat().st_size, 16)
+                    if file_size > MAX_FILE_SIZE or dat_size > MAX_FILE_OFFSET:
+                        raise ValueError(f"File '{filename}' does not fit into the HD6 entry limits!")
+
+                    source_fd = os.open(source_path, os.O_RDONLY)
+                    try:
+                        copy_file_range(source_fd, dat_fd, 0, file_size, dat_size)
+
+                    finally:
+                        os.close(source_fd)
 
-        for i in range(file_count):
-            entry_offset = file_entries_offset + i * 8
-            entry = bytearray(hd6_bytes[entry_offset:entry_offset + 8])
+                    file_entries.append(set_file_entry(template_entries.get(filename, 0), dat_size, file_size))
+                    dat_size = align(dat_size + file_size, DAT_ALIGNMENT)
 
-            stored_offset_val = int.from_bytes(entry[2:5], "little")
-            stored_size_val = int.from_bytes(entry[5:8], "little")
-            actual_offset = (stored_offset_val & 0xFFFFFC) << 9
-            actual_size = stored_size_val << 4
+                os.ftruncate(dat_fd, dat_size)
 
-            if i == target_index:
-                new_stored_size = (new_size >> 4)
-                new_stored_size_bytes = new_stored_size.to_bytes(3, "little")
-                hd6_bytes[entry_offset + 5:entry_offset + 8] = new_stored_size_bytes
+            finally:
+                os.close(dat_fd)
 
-            elif i > target_index:
-                new_actual_offset = actual_offset + delta
-                new_stored_offset = (new_actual_offset >> 9) & 0xFFFFFF
-                new_stored_offset_bytes = new_stored_offset.to_bytes(3, "little")
-                hd6_bytes[entry_offset + 2:entry_offset + 5] = new_stored_offset_bytes
+            # The entry count includes one closing entry that points to the end of the DAT
+            file_entries.append(set_file_entry(0, dat_size, 0))
+            os.replace(temp_dat_path, self.dat_path)
+
+        except Exception as exception:
+            print("[Error] Error writing DAT file:", exception)
+            if temp_dat_path.exists():
+                os.remove(temp_dat_path)
+
+            return False
+
+        if sys.byteorder == "big":
+            file_entries.byteswap()
+
+        p_filename_table = align(HD6_HEADER_SIZE + len(name_chunk_data), 16)
+        p_file_entries = align(p_filename_table + len(filename_table), 16)
+        struct.pack_into("<I", header_bytes, 8, len(name_chunk_data))
+        struct.pack_into("<II", header_bytes, 20, p_filename_table, len(filename_table))
+        struct.pack_into("<II", header_bytes, 36, len(file_entries), p_file_entries)
+
+        hd6_bytes = bytearray(p_file_entries + len(file_entries) * 8)
+        hd6_bytes[:HD6_HEADER_SIZE] = header_bytes
+        hd6_bytes[HD6_HEADER_SIZE:HD6_HEADER_SIZE + len(name_chunk_data)] = name_chunk_data
+        hd6_bytes[p_filename_table:p_filename_table + len(filename_table)] = filename_table
+        hd6_bytes[p_file_entries:] = file_entries.tobytes()
 
         try:
             with open(self.hd6_path, "wb") as f:
@@ -308,12 +1670,19 @@ class Replacement:
         except Exception as exception:
             print("[Error] Error writing HD6 file:", exception)
             return False
-        
-        print("HD6 file updated.")
 
+        print(f"Written {len(filenames)} files ({dat_size} bytes DAT, {len(hd6_bytes)} bytes HD6).")
         return True
 
 
+def get_index_cache(args, hd6_path: Path) -> HD6IndexCache | None:
+    if not args.cache and args.cache_dir is None:
+        return None
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir is not None else None
+    return HD6IndexCache(hd6_path, cache_dir)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Extract, replace or list files in the DAT archive and update the HD6 file accordingly."
@@ -323,17 +1692,80 @@ if __name__ == "__main__":
     extract_parser = subparsers.add_parser("extract", help="Extract files from DAT using HD6.")
     extract_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
     extract_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    extract_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    extract_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
     extract_parser.add_argument("destination_folder", type=str, help="Destination folder for extracted files.")
+    extract_parser.add_argument("--workers", type=int, default=1, help="Number of parallel writer threads.")
+    extract_parser.add_argument("--quiet", action="store_true", help="Do not print every written file.")
+    extract_parser.add_argument("--include", action="append", help="Only extract files matching this pattern (repeatable).")
+    extract_parser.add_argument("--exclude", action="append", help="Skip files matching this pattern (repeatable).")
+    extract_parser.add_argument("--regex", action="store_true", help="Treat the patterns as regular expressions instead of globs.")
+    extract_parser.add_argument("--nested", action="store_true", help="Unpack PAK containers in memory into folders named like the container.")
 
     replace_parser = subparsers.add_parser("replace", help="Replace a file in the DAT and update HD6.")
     replace_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
     replace_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    replace_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    replace_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
     replace_parser.add_argument("target_filename", type=str, help="Filename inside HD6/DAT to replace.")
     replace_parser.add_argument("new_file", type=str, help="Path to the new file to insert.")
+    replace_parser.add_argument("--rewrite", action="store_true", help="Shift the following files instead of appending when the new file does not fit.")
+    replace_parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT // 0x100000, help="Copy buffer limit in MiB for DAT rewrites.")
+
+    replace_many_parser = subparsers.add_parser("replace-many", help="Replace all files listed in a manifest in one pass.")
+    replace_many_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
+    replace_many_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    replace_many_parser.add_argument("manifest", type=str, help="Text file with one 'archive path<TAB>local file' pair per line.")
+    replace_many_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    replace_many_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+    replace_many_parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT // 0x100000, help="Copy buffer limit in MiB for DAT rewrites.")
+
+    sync_parser = subparsers.add_parser("sync", help="Write all changed files of an extracted folder back into the DAT.")
+    sync_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
+    sync_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    sync_parser.add_argument("source_folder", type=str, help="Folder with the extracted and edited files.")
+    sync_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    sync_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+    sync_parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT // 0x100000, help="Copy buffer limit in MiB for DAT rewrites.")
+
+    manifest_parser = subparsers.add_parser("manifest", help="Write a manifest with the digest of every file.")
+    manifest_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
+    manifest_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    manifest_parser.add_argument("manifest", type=str, help="Path of the manifest to write.")
+    manifest_parser.add_argument("--workers", type=int, help="Number of hashing threads (default: CPU count).")
+    manifest_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    manifest_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+
+    verify_parser = subparsers.add_parser("verify", help="Compare the archive against a manifest.")
+    verify_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
+    verify_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    verify_parser.add_argument("manifest", type=str, help="Path of the manifest to compare against.")
+    verify_parser.add_argument("--workers", type=int, help="Number of hashing threads (default: CPU count).")
+    verify_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    verify_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+
+    index_parser = subparsers.add_parser("index", help="Write a SQLite catalog of every file, including files inside containers.")
+    index_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
+    index_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    index_parser.add_argument("database", type=str, help="Path of the SQLite database to write.")
+    index_parser.add_argument("--workers", type=int, help="Number of reading threads (default: CPU count).")
+    index_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    index_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+
+    build_parser = subparsers.add_parser("build", help="Build a new DAT and HD6 file from a folder.")
+    build_parser.add_argument("source_folder", type=str, help="Folder with the files to pack.")
+    build_parser.add_argument("dat_path", type=str, help="Path of the DAT file to write.")
+    build_parser.add_argument("hd6_path", type=str, help="Path of the HD6 file to write.")
+    build_parser.add_argument("--template", type=str, help="Existing HD6 file to take the header, file order and entry flags from.")
 
     list_parser = subparsers.add_parser("list", help="List filenames in the HD6 file.")
     list_parser.add_argument("dat_path", type=str, help="Path to the DAT file.")
     list_parser.add_argument("hd6_path", type=str, help="Path to the HD6 file.")
+    list_parser.add_argument("--cache", action="store_true", help="Use an index cache file next to the HD6 file.")
+    list_parser.add_argument("--cache-dir", type=str, help="Use an index cache file in this folder.")
+    list_parser.add_argument("--include", action="append", help="Only list files matching this pattern (repeatable).")
+    list_parser.add_argument("--exclude", action="append", help="Skip files matching this pattern (repeatable).")
+    list_parser.add_argument("--regex", action="store_true", help="Treat the patterns as regular expressions instead of globs.")
 
     args = parser.parse_args()
 
@@ -341,7 +1773,9 @@ if __name__ == "__main__":
         dat_path = Path(args.dat_path)
         hd6_path = Path(args.hd6_path)
         destination_folder = Path(args.destination_folder)
-        extractor = Extraction(dat_path, hd6_path, destination_folder)
+        index_cache = get_index_cache(args, hd6_path)
+        extraction_class = NestedExtraction if args.nested else Extraction
+        extractor = extraction_class(dat_path, hd6_path, destination_folder, args.workers, args.quiet, args.include, args.exclude, args.regex, index_cache)
         if extractor.perform():
             print("Extraction successful!")
 
@@ -353,20 +1787,96 @@ if __name__ == "__main__":
         hd6_path = Path(args.hd6_path)
         target_filename = args.target_filename
         new_file_path = Path(args.new_file)
-        replacer = Replacement(dat_path, hd6_path, target_filename, new_file_path)
+        index_cache = get_index_cache(args, hd6_path)
+        replacer = Replacement(dat_path, hd6_path, target_filename, new_file_path, index_cache, args.rewrite, args.memory_limit * 0x100000)
+        if replacer.perform():
+            print("Replacement successful!")
+
+        else:
+            print("[Error] Replacement failed!")
+
+    elif args.command == "replace-many":
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        manifest_path = Path(args.manifest)
+        index_cache = get_index_cache(args, hd6_path)
+        replacer = BatchReplacement(dat_path, hd6_path, manifest_path, index_cache, args.memory_limit * 0x100000)
         if replacer.perform():
             print("Replacement successful!")
 
         else:
             print("[Error] Replacement failed!")
 
+    elif args.command == "sync":
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        source_folder = Path(args.source_folder)
+        index_cache = get_index_cache(args, hd6_path)
+        synchronization = Synchronization(dat_path, hd6_path, source_folder, index_cache, args.memory_limit * 0x100000)
+        if synchronization.perform():
+            print("Synchronization successful!")
+
+        else:
+            print("[Error] Synchronization failed!")
+
+    elif args.command == "manifest":
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        manifest_path = Path(args.manifest)
+        integrity_manifest = IntegrityManifest(dat_path, hd6_path, manifest_path, args.workers, get_index_cache(args, hd6_path))
+        if not integrity_manifest.create():
+            print("[Error] Manifest creation failed!")
+
+    elif args.command == "verify":
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        manifest_path = Path(args.manifest)
+        integrity_manifest = IntegrityManifest(dat_path, hd6_path, manifest_path, args.workers, get_index_cache(args, hd6_path))
+        if integrity_manifest.verify():
+            print("Verification successful!")
+
+        else:
+            print("[Error] Verification failed!")
+
+    elif args.command == "index":
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        catalog_index = CatalogIndex(dat_path, hd6_path, Path(args.database), args.workers, get_index_cache(args, hd6_path))
+        if catalog_index.perform():
+            print("Indexing successful!")
+
+        else:
+            print("[Error] Indexing failed!")
+
+    elif args.command == "build":
+        source_folder = Path(args.source_folder)
+        dat_path = Path(args.dat_path)
+        hd6_path = Path(args.hd6_path)
+        template_hd6_path = Path(args.template) if args.template is not None else None
+        builder = HD6Builder(source_folder, dat_path, hd6_path, template_hd6_path)
+        if builder.perform():
+            print("Build successful!")
+
+        else:
+            print("[Error] Build failed!")
+
     elif args.command == "list":
         dat_path = Path(args.dat_path)
         hd6_path = Path(args.hd6_path)
-        extractor = HD6Extractor(hd6_path)
+        if not DatRewriter(dat_path, hd6_path).recover():
+            sys.exit(1)
+
+        extractor = HD6Extractor(hd6_path, get_index_cache(args, hd6_path))
         extractor.load()
         extractor.parse_file_entries()
-        filenames = extractor.decode_filenames(no_system_delemiters=True)
+        extractor.build_index()
+
+        try:
+            selected = extractor.select(args.include, args.exclude, args.regex)
+
+        except re.error as exception:
+            print("[Error] Invalid filter pattern!", exception)
+            selected = []
 
-        for filename in filenames:
-            print(filename)
\ No newline at end of file
+        for i in selected:
+            print(extractor.filenames[i].replace(os.path.sep, "\\"))
\ No newline at end of file
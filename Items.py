@@ -4,7 +4,7 @@ from pathlib import Path
 
 from BinaryUtils import BytePtr
 from ScriptInterpreter import SPI_STACK, SPI_TAG_PARAM, ScriptInterpreter
-from Utils import fix_umlaute, read_file
+from Utils import fix_umlaute, read_data_file
 
 
 class Items:
@@ -27,8 +27,7 @@ class Items:
 
         
     def load(self):
-        filename = Path(self.iso_dir, "bin_ext", f"itemstr1_{self.lang_id}.lst")
-        file_content = read_file(filename)
+        file_content = read_data_file(self.iso_dir, "bin_ext", f"itemstr1_{self.lang_id}.lst")
 
         file_size = len(file_content)
         byte_ptr = BytePtr()
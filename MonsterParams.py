@@ -1,10 +1,15 @@
 import argparse
+import bisect
+import sys
 
+from enum import Enum
 from pathlib import Path
 
 from Actions import Actions
-from Utils import fix_umlaute, read_file, SafeEnum
+from Utils import fix_umlaute, read_data_file, SafeEnum
 from BinaryUtils import BytePtr
+from BinarySchema import Record, RecordView, Schema, import_numpy
+from ColumnQuery import ColumnQuery, LazyColumns, QueryError, format_rows
 from ObjDump import dump_obj
 from ScriptInterpreter import SPI_TAG_PARAM, SPI_STACK, ScriptInterpreter
 from IDMappedTextFileParser import parse_id_mapped_text_file
@@ -23,225 +28,346 @@ class TRIPLE_ACTION(SafeEnum):
 	ROT_3_1 = 7
 	
 
+def create_stage_property(name: str, stage: str) -> property:
+    # Post-processed attributes run their stage for all monsters the first time one of them is read
+    storage_name = "_" + name
+
+    def get_value(self):
+        if not hasattr(self, storage_name) and self._post_processor is not None:
+            self._post_processor.run_stage(stage)
+
+        try:
+            return getattr(self, storage_name)
+
+        except AttributeError:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'") from None
+
+
+    def set_value(self, value):
+        setattr(self, storage_name, value)
+
+
+    return property(get_value, set_value)
+
+
 class MonsterParamsFileHandler:
     def __init__(self, data_dir):
         self.data_dir = data_dir
 
+        self.buffer = None
         self.monster_params = []
 
 
-    class BTL_MONSTER_PARAM_HEADER:
-        def __init__(self, byte_ptr: BytePtr):
-            self.ptr = byte_ptr
-        
-
-        def load(self):
-            self.version_info = VersionInfo(self.ptr)
-            self.version_info.load()
-
-            self.version = self.ptr.get_string(32)
-            self.monster_num = self.ptr.get_int32()
-            self.monster_param_offset = self.ptr.get_int32()
-            self.table_num = self.ptr.get_int32()
-            self.table_offset = self.ptr.get_int32()
-
-
-    class BTL_MONSTER_PARAM:
-        def __init__(self, byte_ptr: BytePtr):
-            self.ptr = byte_ptr
-
-            self.exclude_dump = ("dummy1", "dummy2", "dummy3", "dummy4", "zero_padding1", "zero_padding2")
-
-            self._fields = [
-                ("name", "string", 32),
-                ("monster_id", "uint16"),
-                ("book_series_id", "byte"),
-                ("dummy1", "bytes_array", 1),
-                ("series", "uint16"),
-                ("level", "byte"),
-                ("dummy2", "bytes_array", 1),
-                ("book_id", "uint16"),
-                ("dummy3", "bytes_array", 2),
-                ("maxHP", "int32"),
-                ("maxMP", "int32"),
-                ("agility", "int32"),
-                ("power", "int32"),
-                ("defense", "int32"),
-                ("exp", "int32"),
-                ("gold", "int32"),
-                ("a_item", "uint16_array", 2),
-                ("a_item_probability", "bytes_array", 2),
-                ("absolute_omiyage", "byte"),
-                ("a_spell_defense", "bytes_array", 7),
-                ("a_tension_defense", "byte"),
-                ("init_status", "byte"),
-                ("init_status_rate", "byte"),
-                ("zero_padding1", "bytes_array", 7),
-                ("intelligence", "byte"),
-                ("pattern", "byte"),
-                ("a_action", "uint16_array", 6),
-                ("a_group", "bytes_array", 6),
-                ("triple_action", "byte"),
-                ("concentrated_atack", "byte"),
-                ("recovery", "byte"),
-                ("mikawashi", "byte"),
-                ("frighten", "byte"),
-                ("dummy4", "bytes_array", 1),
-                ("unique_id", "uint16"),
-                ("zero_padding2", "bytes_array", 4)
-            ]
-
-        def load(self):
-            for name, typ, *args in self._fields:
-                setattr(self, name, getattr(self.ptr, f"get_{typ}")(*args))
-
-
-        def save(self):
-            for name, typ, *args in self._fields:
-                value = getattr(self, name)
-                getattr(self.ptr, f"set_{typ}")(value, *args)
-
-
-    class BATTLE_TABLE:
-        def __init__(self, byte_ptr: BytePtr):
-            self.ptr = byte_ptr
-
-
-        class RECOVER_HP:
-            def __init__(self, byte_ptr: BytePtr):
-                self.ptr = byte_ptr
-
-                
-            def load(self):
-                self.min = self.ptr.get_uint16()
-                self.max = self.ptr.get_uint16()
-
-                return self
-
-
-        class THREAT_RATE_RESULT:
-            def __init__(self, byte_ptr: BytePtr):
-                self.ptr = byte_ptr
-
-                
-            def load(self):
-                self.runaway = self.ptr.get_byte()
-                self.surprised = self.ptr.get_byte()
-                self.attack = self.ptr.get_byte()
-                self.no_reaction = self.ptr.get_byte()
-
-                return self
-
-
-        class THREAT_RATE:
-            def __init__(self, byte_ptr: BytePtr):
-                self.ptr = byte_ptr
-
-                
-            def load(self):
-                self.level = self.ptr.get_uint16()
-                self.result = [MonsterParamsFileHandler.BATTLE_TABLE.THREAT_RATE_RESULT(self.ptr).load() for _ in range(2)]
-
-                return self
-
-
-        class RECOVER_STAT_RATE:
-            def __init__(self, byte_ptr: BytePtr):
-                self.ptr = byte_ptr
-
-                
-            def load(self):
-                self.player = self.ptr.get_byte()
-                self.monster = self.ptr.get_byte()
-
-                return self
-
-
-        class LINE_GRAPH:
-            def __init__(self, byte_ptr: BytePtr):
-                self.ptr = byte_ptr
-
-                
-            def load(self):
-                self.param = self.ptr.get_uint16()
-                self.rate = self.ptr.get_uint16()
-
-                return self
-
-        
-        def load(self):
-            self.a_item_rate = [self.ptr.get_uint16() for _ in range(8)]
-            self.a_recover_hp = [MonsterParamsFileHandler.BATTLE_TABLE.RECOVER_HP(self.ptr).load() for _ in range(4)]
-            self.a_threat_rate = [MonsterParamsFileHandler.BATTLE_TABLE.THREAT_RATE(self.ptr).load() for _ in range(16)]
-            self.a_step_out_rate = self.ptr.get_uint16_array(5)
-            self.a_action_pattern_rate = [
-                self.ptr.get_bytes_array(6)
-                for _ in range(4)
-            ]
-
-            self.a_recover_stat_rate = [
-                [self.RECOVER_STAT_RATE(self.ptr).load() for _ in range(4)]  # Spalten
-                for _ in range(3)                                            # Zeilen
-            ]
-
-            self.a_target_player_rate = [
-                self.ptr.get_bytes_array(5)
-                for _ in range(5)
-            ]
-
-            self.ptr.skip(1)
-
-            self.a_step_out_line_graph = [self.LINE_GRAPH(self.ptr).load() for _ in range(11)]
-            self.a_kabau_line_graph = [self.LINE_GRAPH(self.ptr).load() for _ in range(11)]
-            self.a_mitoreru_line_graph = [self.LINE_GRAPH(self.ptr).load() for _ in range(11)]
-
-            return self
+    class BTL_MONSTER_PARAM_HEADER(Record):
+        SCHEMA = Schema([
+            ("version_info", VersionInfo),
+            ("version", "string", 32),
+            ("monster_num", "int32"),
+            ("monster_param_offset", "int32"),
+            ("table_num", "int32"),
+            ("table_offset", "int32")
+        ])
+
+
+    class BTL_MONSTER_PARAM(RecordView):
+        __slots__ = ("_index", "_post_processor", "_name_processed", "_a_item_processed", "_a_item_probability_processed", "_a_action_processed",
+                     "_is_wander_additional", "_triple_action_enum")
+
+        exclude_dump = ("dummy1", "dummy2", "dummy3", "dummy4", "zero_padding1", "zero_padding2")
+
+        name_processed = create_stage_property("name_processed", "names")
+        a_item_processed = create_stage_property("a_item_processed", "items")
+        a_item_probability_processed = create_stage_property("a_item_probability_processed", "drop_rates")
+        a_action_processed = create_stage_property("a_action_processed", "actions")
+        is_wander_additional = create_stage_property("is_wander_additional", "wander")
+        triple_action_enum = create_stage_property("triple_action_enum", "enums")
+
+        # Plain assignments to these fields keep the lookup index in sync
+        WATCHED_FIELDS = ("unique_id", "monster_id", "book_id", "series")
+
+        def __init__(self, buffer: bytearray, offset: int):
+            super().__init__(buffer, offset)
+            self._index = None
+            self._post_processor = None
+
+
+        def field_changed(self, name: str, old_value, new_value) -> None:
+            if self._index is not None:
+                self._index.move(self, name, old_value, new_value)
+
+
+        SCHEMA = Schema([
+            ("name", "string", 32),
+            ("monster_id", "uint16"),
+            ("book_series_id", "byte"),
+            ("dummy1", "bytes_array", 1),
+            ("series", "uint16"),
+            ("level", "byte"),
+            ("dummy2", "bytes_array", 1),
+            ("book_id", "uint16"),
+            ("dummy3", "bytes_array", 2),
+            ("maxHP", "int32"),
+            ("maxMP", "int32"),
+            ("agility", "int32"),
+            ("power", "int32"),
+            ("defense", "int32"),
+            ("exp", "int32"),
+            ("gold", "int32"),
+            ("a_item", "uint16_array", 2),
+            ("a_item_probability", "bytes_array", 2),
+            ("absolute_omiyage", "byte"),
+            ("a_spell_defense", "bytes_array", 7),
+            ("a_tension_defense", "byte"),
+            ("init_status", "byte"),
+            ("init_status_rate", "byte"),
+            ("zero_padding1", "bytes_array", 7),
+            ("intelligence", "byte"),
+            ("pattern", "byte"),
+            ("a_action", "uint16_array", 6),
+            ("a_group", "bytes_array", 6),
+            ("triple_action", "byte"),
+            ("concentrated_atack", "byte"),
+            ("recovery", "byte"),
+            ("mikawashi", "byte"),
+            ("frighten", "byte"),
+            ("dummy4", "bytes_array", 1),
+            ("unique_id", "uint16"),
+            ("zero_padding2", "bytes_array", 4)
+        ])
+
+
+    class BATTLE_TABLE(Record):
+        class RECOVER_HP(Record):
+            SCHEMA = Schema([
+                ("min", "uint16"),
+                ("max", "uint16")
+            ])
+
+
+        class THREAT_RATE_RESULT(Record):
+            SCHEMA = Schema([
+                ("runaway", "byte"),
+                ("surprised", "byte"),
+                ("attack", "byte"),
+                ("no_reaction", "byte")
+            ])
+
+
+        class THREAT_RATE(Record):
+            pass
+
+
+        # Nested class bodies cannot see THREAT_RATE_RESULT, so the schema is attached from here
+        THREAT_RATE.SCHEMA = Schema([
+            ("level", "uint16"),
+            ("result", THREAT_RATE_RESULT, (2,))
+        ])
+
+
+        class RECOVER_STAT_RATE(Record):
+            SCHEMA = Schema([
+                ("player", "byte"),
+                ("monster", "byte")
+            ])
+
+
+        class LINE_GRAPH(Record):
+            SCHEMA = Schema([
+                ("param", "uint16"),
+                ("rate", "uint16")
+            ])
+
+
+        SCHEMA = Schema([
+            ("a_item_rate", "uint16", (8,)),
+            ("a_recover_hp", RECOVER_HP, (4,)),
+            ("a_threat_rate", THREAT_RATE, (16,)),
+            ("a_step_out_rate", "uint16_array", 5),
+            ("a_action_pattern_rate", "bytes_array", 6, (4,)),
+            ("a_recover_stat_rate", RECOVER_STAT_RATE, (3, 4)),  # Zeilen, Spalten
+            ("a_target_player_rate", "bytes_array", 5, (5,)),
+            (None, "padding", 1),
+            ("a_step_out_line_graph", LINE_GRAPH, (11,)),
+            ("a_kabau_line_graph", LINE_GRAPH, (11,)),
+            ("a_mitoreru_line_graph", LINE_GRAPH, (11,))
+        ])
         
 
     def load(self):
         byte_ptr = BytePtr()
 
-        file_content = read_file(Path(self.data_dir, "bin_ext", "btl_monster_param_10.bin"))
+        # The monster records are views into this buffer, edits to them end up here
+        self.buffer = bytearray(read_data_file(self.data_dir, "bin_ext", "btl_monster_param_10.bin"))
 
-        byte_ptr.set_data(file_content)
+        byte_ptr.set_data(self.buffer)
 
         header = self.BTL_MONSTER_PARAM_HEADER(byte_ptr)
         header.load()
 
-        byte_ptr.pos = header.monster_param_offset
-        for i in range(header.monster_num):
-            monster_param = self.BTL_MONSTER_PARAM(byte_ptr)
-            monster_param.load()
-            self.monster_params.append(monster_param)
+        record_size = self.BTL_MONSTER_PARAM.SCHEMA.size
+        self.monster_params = [
+            self.BTL_MONSTER_PARAM(self.buffer, header.monster_param_offset + i * record_size)
+            for i in range(header.monster_num)
+        ]
 
+        byte_ptr.pos = header.monster_param_offset + header.monster_num * record_size
         self.monster_action_table = [self.BATTLE_TABLE(byte_ptr).load() for _ in range(header.table_num)]
 
 
+class MonsterParamsColumns:
+    """
+    Maps the monster records and the battle tables onto NumPy structured arrays, so every field
+    is a column over all monsters (e.g. columns["maxHP"]). The arrays share one buffer, writes go
+    straight into it and save() writes it back out. Needs NumPy.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+
+        self.buffer = None
+        self.monster_params = None
+        self.monster_action_table = None
+
+
+    def load(self):
+        numpy = import_numpy()
+
+        monster_param_dtype = MonsterParamsFileHandler.BTL_MONSTER_PARAM.SCHEMA.get_dtype()
+        battle_table_dtype = MonsterParamsFileHandler.BATTLE_TABLE.SCHEMA.get_dtype()
+
+        self.buffer = bytearray(read_data_file(self.data_dir, "bin_ext", "btl_monster_param_10.bin"))
+        byte_ptr = BytePtr()
+        byte_ptr.set_data(self.buffer)
+
+        header = MonsterParamsFileHandler.BTL_MONSTER_PARAM_HEADER(byte_ptr)
+        header.load()
+
+        # Like MonsterParamsFileHandler, the battle tables are read right behind the monster records
+        self.monster_params = numpy.frombuffer(
+            self.buffer, dtype=monster_param_dtype, count=header.monster_num, offset=header.monster_param_offset
+        )
+        self.monster_action_table = numpy.frombuffer(
+            self.buffer, dtype=battle_table_dtype, count=header.table_num,
+            offset=header.monster_param_offset + header.monster_num * monster_param_dtype.itemsize
+        )
+        return self
+
+
+    def __getitem__(self, column: str):
+        return self.monster_params[column]
+
+
+    def save(self, path_out):
+        with open(path_out, "wb") as f:
+            f.write(self.buffer)
+
+
+class MonsterParamsIndex:
+    INDEXED_FIELDS = MonsterParamsFileHandler.BTL_MONSTER_PARAM.WATCHED_FIELDS
+
+    def __init__(self, monster_params: list[MonsterParamsFileHandler.BTL_MONSTER_PARAM]):
+        # Buckets keep the file order, so the first entry is what a linear search would have found
+        self.positions = {monster_param: i for i, monster_param in enumerate(monster_params)}
+        self.indexes = {field_name: {} for field_name in self.INDEXED_FIELDS}
+        for monster_param in monster_params:
+            monster_param._index = self
+            for field_name, index in self.indexes.items():
+                index.setdefault(getattr(monster_param, field_name), []).append(monster_param)
+
+
+    def get(self, field_name: str, value) -> list[MonsterParamsFileHandler.BTL_MONSTER_PARAM]:
+        return self.indexes[field_name].get(value, [])
+
+
+    def get_first(self, field_name: str, value) -> MonsterParamsFileHandler.BTL_MONSTER_PARAM | None:
+        bucket = self.indexes[field_name].get(value)
+        return bucket[0] if bucket else None
+
+
+    def set_field(self, monster_param: MonsterParamsFileHandler.BTL_MONSTER_PARAM, field_name: str, value) -> None:
+        # Records attached to this index report their changes themselves through field_changed
+        if field_name not in self.indexes or monster_param._index is self:
+            setattr(monster_param, field_name, value)
+            return
+
+        old_value = getattr(monster_param, field_name)
+        setattr(monster_param, field_name, value)
+        self.move(monster_param, field_name, old_value, getattr(monster_param, field_name))
+
+
+    def move(self, monster_param: MonsterParamsFileHandler.BTL_MONSTER_PARAM, field_name: str, old_value, new_value) -> None:
+        if old_value == new_value:
+            return
+
+        index = self.indexes[field_name]
+        bucket = index[old_value]
+        bucket.remove(monster_param)
+        if not bucket:
+            del index[old_value]
+
+        bisect.insort(index.setdefault(new_value, []), monster_param, key=self.positions.get)
+
+
 class MonsterParamsPostProcessor:
-    def __init__(self, data_dir: str, lang_id: int, monster_params: list[MonsterParamsFileHandler.BTL_MONSTER_PARAM], monster_action_table):
+    def __init__(self, data_dir: str, lang_id: int, monster_params: list[MonsterParamsFileHandler.BTL_MONSTER_PARAM], monster_action_table,
+                 index: MonsterParamsIndex = None):
         self.data_dir = data_dir
         self.lang_id = lang_id
         self.monster_params = monster_params
+        self.index = index if index is not None else MonsterParamsIndex(monster_params)
 
         self.monster_action_table = monster_action_table
+        self.completed_stages = set()
+
+        for monster_param in monster_params:
+            monster_param._post_processor = self
 
         self.SPI_TAG_LOAD_MONSTER_NAME = SPI_TAG_PARAM("MN", self.SI_MONS_NAME)
             
 
+    STAGES = {
+        "names": "process_monster_name",
+        "actions": "process_monster_actions",
+        "items": "process_monster_items",
+        "drop_rates": "process_item_drop_rate",
+        "wander": "process_additional_is_wander",
+        "enums": "process_enums",
+    }
+
+    def run_stage(self, stage: str) -> None:
+        if stage not in self.STAGES:
+            raise ValueError(f"Unknown post-processing stage '{stage}'")
+
+        # A stage that failed is not marked as completed, so the next access tries it again
+        if stage not in self.completed_stages:
+            getattr(self, self.STAGES[stage])()
+            self.completed_stages.add(stage)
+
+
     def monster_id_to_unit_id(self, monster_id: int):
-        for param in self.monster_params:
-            if param.monster_id == monster_id:
-                return param.unique_id
-            
-        return None
+        monster_param = self.index.get_first("monster_id", monster_id)
+        return monster_param.unique_id if monster_param is not None else None
     
     
     def get_monster_param(self, unique_id: int):
-        for param in self.monster_params:
-            if param.unique_id == unique_id:
-                return param
+        return self.index.get_first("unique_id", unique_id)
+
+
+    def get_monster_param_by_monster_id(self, monster_id: int):
+        return self.index.get_first("monster_id", monster_id)
 
-        return None
+
+    def get_monster_params_by_book_id(self, book_id: int):
+        return self.index.get("book_id", book_id)
+
+
+    def get_monster_params_by_series(self, series: int):
+        return self.index.get("series", series)
+
+
+    def set_monster_field(self, monster_param: MonsterParamsFileHandler.BTL_MONSTER_PARAM, field_name: str, value) -> None:
+        # Goes through the index, so lookups stay right when an indexed field changes
+        self.index.set_field(monster_param, field_name, value)
     
 
     def SI_MONS_NAME(self, SPI_STACK: SPI_STACK, n):
@@ -260,8 +386,7 @@ class MonsterParamsPostProcessor:
 
 
     def process_monster_name(self):
-        filename = Path(self.data_dir, "bin_ext", f"monster_name_{self.lang_id}.txt")
-        file_content = read_file(filename)
+        file_content = read_data_file(self.data_dir, "bin_ext", f"monster_name_{self.lang_id}.txt")
 
         file_size = len(file_content)
         byte_ptr = BytePtr()
@@ -326,7 +451,7 @@ class MonsterParamsPostProcessor:
 
 
     def process_additional_is_wander(self):
-        file_content = read_file(Path(self.data_dir, "bin_ext", "wander_mons_name_1.txt")).decode("shift-jis")
+        file_content = read_data_file(self.data_dir, "bin_ext", "wander_mons_name_1.txt").decode("shift-jis")
         data = parse_id_mapped_text_file(file_content)
         for monster_param in self.monster_params:
             if monster_param.unique_id in data:
@@ -347,28 +472,62 @@ class MonsterParams:
         self.lang_id = lang_id
 
         self.monster_params = None
+        self.buffer = None
+        self.index = None
     
 
     get_monster_param = MonsterParamsPostProcessor.get_monster_param
     monster_id_to_unit_id = MonsterParamsPostProcessor.monster_id_to_unit_id
+    get_monster_param_by_monster_id = MonsterParamsPostProcessor.get_monster_param_by_monster_id
+    get_monster_params_by_book_id = MonsterParamsPostProcessor.get_monster_params_by_book_id
+    get_monster_params_by_series = MonsterParamsPostProcessor.get_monster_params_by_series
+    set_monster_field = MonsterParamsPostProcessor.set_monster_field
 
-    def load(self):
+    def load(self, stages=()):
+        # Stages that are not requested here run on their own once one of their attributes is read
         monster_params_file_handler = MonsterParamsFileHandler(self.data_dir)
         monster_params_file_handler.load()
 
         monster_params_post_processor = MonsterParamsPostProcessor(self.data_dir, self.lang_id, monster_params_file_handler.monster_params, monster_params_file_handler.monster_action_table)
 
-        monster_params_post_processor.process_monster_name()
-        monster_params_post_processor.process_monster_actions()
-        monster_params_post_processor.process_monster_items()
-        monster_params_post_processor.process_item_drop_rate()
-        monster_params_post_processor.process_additional_is_wander()
-        monster_params_post_processor.process_enums()
+        for stage in stages:
+            monster_params_post_processor.run_stage(stage)
 
         self.monster_params = monster_params_post_processor.monster_params
+        self.buffer = monster_params_file_handler.buffer
+        self.index = monster_params_post_processor.index
         self._monster_action_table = monster_params_file_handler.monster_action_table
 
 
+    def get_columns(self) -> LazyColumns:
+        # Raw bytes become tuples of ints and enums their names, so every value can be compared and printed
+        def to_column_value(value):
+            if isinstance(value, (bytes, bytearray)):
+                return tuple(value)
+
+            if isinstance(value, Enum):
+                return value.name
+
+            return value
+
+
+        monster_param_type = MonsterParamsFileHandler.BTL_MONSTER_PARAM
+        names = [name for name, *_ in monster_param_type.SCHEMA.accessors if name not in monster_param_type.exclude_dump]
+        names += [name for name, value in vars(monster_param_type).items() if isinstance(value, property) and name not in names and name not in monster_param_type.exclude_dump]
+
+        # Columns are only built when a query uses them, so only the stages they need run
+        return LazyColumns(
+            names,
+            lambda name: [to_column_value(getattr(monster_param, name)) for monster_param in self.monster_params],
+            len(self.monster_params)
+        )
+
+
+    def query(self, where: str = None, order_by: str = None, descending: bool = False, select: str = None, limit: int = None) -> tuple[list[str], list[tuple]]:
+        columns = self.get_columns()
+        return ColumnQuery(columns, columns.row_count).run(where, order_by, descending, select, limit)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Monster Parameter Dumper")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -377,23 +536,45 @@ if __name__ == "__main__":
     dump_parser.add_argument("data_dir", type=str, help="Data directory")
     dump_parser.add_argument("lang_id", type=int, help="Language ID")
     
+    query_parser = subparsers.add_parser("query", help="Filter, sort and print monster parameters")
+
+    query_parser.add_argument("data_dir", type=str, help="Data directory")
+    query_parser.add_argument("lang_id", type=int, help="Language ID")
+    query_parser.add_argument("--where", type=str, help="Filter expression, e.g. 'level >= 30 and gold > 100'")
+    query_parser.add_argument("--order-by", type=str, help="Sort expression(s), e.g. 'exp / maxHP'")
+    query_parser.add_argument("--desc", action="store_true", help="Sort in descending order")
+    query_parser.add_argument("--select", type=str, help="Comma separated expressions to print (default: all columns)")
+    query_parser.add_argument("--limit", type=int, help="Print at most this many rows")
+    query_parser.add_argument("--format", choices=["table", "csv", "json"], default="table", help="Output format")
+    
     args = parser.parse_args()
 
     monster_params = MonsterParams(Path(args.data_dir), args.lang_id)
-    monster_params.load()
-    
-    with open("monster_params.json", "w", encoding="utf-8") as f:
-        f.write(
-            dump_obj(
-                monster_params.monster_params,
-                desired_order = ["name", "name_processed", "monster_id", "is_wander_additional", "book_series_id", "series", "level", "book_id",
-                                "maxHP", "maxMP", "agility", "power", "defense", "exp", "gold",
-                                "a_item", "a_item_processed", "a_item_probability", "a_item_probability_processed", "absolute_omiyage", "a_spell_defense",
-                                "a_tension_defense", "init_status", "init_status_rate", "intelligence",
-                                "pattern", "a_action", "a_action_processed", "a_group", "triple_action", "triple_action_enum", "concentrated_atack",
-                                "recovery", "mikawashi", "frighten", "unique_id"]
+    # The dump contains every post-processed attribute, queries only run the stages they use
+    monster_params.load(stages=MonsterParamsPostProcessor.STAGES if args.command == "dump" else ())
+
+    if args.command == "query":
+        try:
+            headers, rows = monster_params.query(args.where, args.order_by, args.desc, args.select, args.limit)
+            print(format_rows(headers, rows, args.format))
+
+        except QueryError as exception:
+            print(f"[Error] {exception}")
+            sys.exit(1)
+
+    elif args.command == "dump":
+        with open("monster_params.json", "w", encoding="utf-8") as f:
+            f.write(
+                dump_obj(
+                    monster_params.monster_params,
+                    desired_order = ["name", "name_processed", "monster_id", "is_wander_additional", "book_series_id", "series", "level", "book_id",
+                                    "maxHP", "maxMP", "agility", "power", "defense", "exp", "gold",
+                                    "a_item", "a_item_processed", "a_item_probability", "a_item_probability_processed", "absolute_omiyage", "a_spell_defense",
+                                    "a_tension_defense", "init_status", "init_status_rate", "intelligence",
+                                    "pattern", "a_action", "a_action_processed", "a_group", "triple_action", "triple_action_enum", "concentrated_atack",
+                                    "recovery", "mikawashi", "frighten", "unique_id"]
+                )
             )
-        )
 
-    with open("monster_action_table.json", "w", encoding="utf-8") as f:
-        f.write(dump_obj(monster_params._monster_action_table))
\ No newline at end of file
+        with open("monster_action_table.json", "w", encoding="utf-8") as f:
+            f.write(dump_obj(monster_params._monster_action_table))
\ No newline at end of file
@@ -3,6 +3,21 @@ import json
 from types import NoneType
 from enum import Enum
 
+def get_attributes(object) -> dict:
+    if hasattr(object, "__dict__"):
+        return object.__dict__
+
+    # Objects with __slots__ keep their values in properties and slots
+    attributes = {}
+    for cls in reversed(type(object).__mro__):
+        for key, value in cls.__dict__.items():
+            if isinstance(value, property) or key in getattr(cls, "__slots__", ()):
+                if hasattr(object, key):
+                    attributes[key] = getattr(object, key)
+
+    return attributes
+
+
 def dump_obj(object, desired_order: list=[]):
     def serialize(object, desired_order):
         exclude = ("ptr", "byte_data", "exclude_dump")
@@ -12,14 +27,15 @@ def dump_obj(object, desired_order: list=[]):
         if isinstance(object, Enum):
             return f"ENUM<{object.name}>"
         
-        elif hasattr(object, "__dict__"):
+        elif hasattr(object, "__dict__") or hasattr(object, "__slots__"):
             result = OrderedDict()
+            attributes = get_attributes(object)
 
             for key in desired_order:
-                if key in object.__dict__ and key not in exclude and not key.startswith("_"):
-                    result[key] = serialize(object.__dict__[key], desired_order)
+                if key in attributes and key not in exclude and not key.startswith("_"):
+                    result[key] = serialize(attributes[key], desired_order)
             
-            for key, value in object.__dict__.items():
+            for key, value in attributes.items():
                 if key not in result and key not in exclude and not key.startswith("_"):
                     result[key] = serialize(value, desired_order)
 
@@ -1,10 +1,14 @@
 import argparse
+import os
+import struct
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Callable
 
 from BinaryUtils import BytePtr
-from Utils import read_file
+from BinarySchema import Record, Schema
+from Utils import MappedFile, copy_file_range, read_file
 
 KNOWN_FILE_EXTENSIONS = (
     ("pak", "general package"),
@@ -18,17 +22,19 @@ KNOWN_FILE_EXTENSIONS = (
     ("chr", "?"),
 )
 
-class FileHeader:
-    def __init__(self, byte_ptr: BytePtr):
-        self.ptr = byte_ptr
-
+FILE_HEADER_SIZE = 80
+FILE_NAME_SIZE = 64
+MAX_PAK_ALIGNMENT = 0x800
+DEFAULT_PAK_ALIGNMENT = 0x10
 
-    def load(self):
-        self.file_name = self.ptr.get_string(64)
-        self.relative_file_offset = self.ptr.get_int32()
-        self.file_size = self.ptr.get_int32()
-        self.next_header_offset = self.ptr.get_int32()
-        self.version = self.ptr.get_int32()
+class FileHeader(Record):
+    SCHEMA = Schema([
+        ("file_name", "string", FILE_NAME_SIZE),
+        ("relative_file_offset", "int32"),
+        ("file_size", "int32"),
+        ("next_header_offset", "int32"),
+        ("version", "int32")
+    ])
 
 
 class FileData:
@@ -41,36 +47,537 @@ class FileData:
         return self.ptr.get_bytes_array(self.file_size)
 
 
-def process_pak_file(pak_path: str, processor: Callable[[BytePtr, FileHeader], None]) -> None:
+class PakArchive:
+    def __init__(self, pak_path: Path = None, data: bytes = None):
+        self.pak_path = pak_path
+        self.data = data
+
+        self.pak_file = None
+        self.pak_fd = None
+        self.size = 0
+
+        self.headers = []
+        self.entries = {}
+        self.views = []
+
+
+    def load(self) -> "PakArchive":
+        if self.data is not None:
+            self.size = len(self.data)
+
+        else:
+            self.pak_fd = os.open(self.pak_path, os.O_RDONLY)
+            self.size = os.fstat(self.pak_fd).st_size
+
+        self.scan_headers()
+        return self
+
+
+    def close(self) -> None:
+        # Views handed out keep the mapping alive, so they are released together with the archive
+        for view in self.views:
+            try:
+                view.release()
+
+            except BufferError:
+                pass
+
+        self.views = []
+        if self.pak_file is not None:
+            self.pak_file.close()
+            self.pak_file = None
+
+        if self.pak_fd is not None:
+            os.close(self.pak_fd)
+            self.pak_fd = None
+
+
+    def __enter__(self) -> "PakArchive":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.entries
+
+
+    def __iter__(self):
+        return self.iter_entries()
+
+
+    @property
+    def filenames(self) -> list[str]:
+        return [file_header.file_name for _, file_header in self.headers]
+
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if self.data is not None:
+            return self.data[offset:offset + size]
+
+        return os.pread(self.pak_fd, size, offset)
+
+
+    def scan_headers(self) -> None:
+        # Only the 80 byte headers are read, the payloads are skipped over
+        header_pos = 0
+        while self.size - header_pos >= FILE_HEADER_SIZE:
+            byte_ptr = BytePtr()
+            byte_ptr.set_data(self.read_at(header_pos, FILE_HEADER_SIZE))
+
+            file_header = FileHeader(byte_ptr)
+            file_header.load()
+
+            # A payload overlapping its own header can only come from data that is no container
+            if file_header.file_name == "" or file_header.next_header_offset <= 0 or file_header.relative_file_offset < FILE_HEADER_SIZE:
+                break
+
+            self.headers.append((header_pos, file_header))
+            self.entries[file_header.file_name] = (header_pos + file_header.relative_file_offset, file_header.file_size)
+            header_pos += file_header.next_header_offset
+
+
+    def get_view(self, filename: str) -> memoryview:
+        offset, size = self.entries[filename]
+        return self.get_view_at(offset, size)
+
+
+    def get_view_at(self, offset: int, size: int) -> memoryview:
+        if self.data is not None:
+            # Slicing an existing view does not export it again, so the caller can still release it
+            data_view = self.data if isinstance(self.data, memoryview) else memoryview(self.data)
+            return data_view[offset:offset + size]
+
+        # The file is only mapped once a payload is actually requested
+        if self.pak_file is None:
+            self.pak_file = MappedFile(self.pak_path).open()
+
+        view = self.pak_file.get_view(offset, size)
+        self.views.append(view)
+        return view
+
+
+    def read(self, filename: str) -> bytes:
+        offset, size = self.entries[filename]
+        return self.read_at(offset, size)
+
+
+    def iter_entries(self):
+        for header_pos, file_header in self.headers:
+            yield file_header, self.get_view_at(header_pos + file_header.relative_file_offset, file_header.file_size)
+
+
+def is_known_pak_file(pak_path: Path) -> bool:
+    return pak_path.suffix[1:].lower() in [extension for extension, _ in KNOWN_FILE_EXTENSIONS]
+
+
+def open_pak_file(pak_path: str) -> PakArchive | None:
     pak_path = Path(pak_path)
     if not pak_path.exists() or not pak_path.is_file():
         print(f"File not found: {pak_path}")
-        return
+        return None
     
-    if pak_path.suffix[1:] not in [extension for extension, _ in KNOWN_FILE_EXTENSIONS]:
+    if not is_known_pak_file(pak_path):
         print(f"Unknown file extension: {pak_path.suffix}")
-        return
+        return None
     
-    file_content = read_file(pak_path)
-    byte_ptr = BytePtr()
-    byte_ptr.set_data(file_content)
-    
-    while True:
-        start_pos = byte_ptr.pos
+    return PakArchive(pak_path).load()
+
+
+def process_pak_file(pak_path: str, processor: Callable[[BytePtr, FileHeader], None]) -> None:
+    pak_archive = open_pak_file(pak_path)
+    if pak_archive is None:
+        return
+
+    with pak_archive:
+        process_pak_archive(pak_archive, processor)
 
-        file_header = FileHeader(byte_ptr)
-        file_header.load()
 
-        if file_header.file_name == "" or file_header.next_header_offset <= 0:
-            break
-        
-        byte_ptr.set_pos(start_pos + file_header.relative_file_offset)
+def process_pak_archive(pak_archive: PakArchive, processor: Callable[[BytePtr, FileHeader], None]) -> None:
+    byte_ptr = BytePtr()
+    for file_header, file_data in pak_archive:
+        byte_ptr.set_data(file_data)
         processor(byte_ptr, file_header)
 
-        byte_ptr.set_pos(start_pos + file_header.next_header_offset)
+    # Views into the mapping have to be gone before the archive is closed
+    byte_ptr.set_data(b"")
+
+
+def get_pak_alignment(headers: list[tuple[int, FileHeader]]) -> int:
+    # The largest power of two every header position is aligned to, including the closing header
+    header_positions = [header_pos for header_pos, _ in headers]
+    if headers:
+        last_header_pos, last_file_header = headers[-1]
+        header_positions.append(last_header_pos + last_file_header.next_header_offset)
+
+    alignment = MAX_PAK_ALIGNMENT
+    for header_pos in header_positions:
+        while header_pos % alignment != 0:
+            alignment //= 2
+
+    return max(alignment, 4)
+
+
+def align(value: int, alignment: int) -> int:
+    return ((value + alignment - 1) // alignment) * alignment
+
+
+class PakReplacement:
+    def __init__(self, pak_path: Path, replacements: list[tuple[str, Path]]):
+        self.pak_path = pak_path
+        self.replacements = replacements
+
+
+    def perform(self) -> bool:
+        if not self.pak_path.is_file():
+            print("[Error] PAK file not found!")
+            return False
+
+        with PakArchive(self.pak_path).load() as pak_archive:
+            headers = pak_archive.headers
+            pak_size = pak_archive.size
+
+        header_indices = {file_header.file_name: i for i, (_, file_header) in enumerate(headers)}
+
+        new_files = {}
+        for target_filename, new_file_path in self.replacements:
+            if target_filename not in header_indices:
+                print(f"[Error] Target filename '{target_filename}' not found in PAK!")
+                return False
+
+            if not new_file_path.is_file():
+                print(f"[Error] New file '{new_file_path}' not found!")
+                return False
+
+            new_files[header_indices[target_filename]] = new_file_path
+
+        fits = all(
+            new_file_path.stat().st_size <= headers[i][1].next_header_offset - headers[i][1].relative_file_offset
+            for i, new_file_path in new_files.items()
+        )
+
+        try:
+            if fits:
+                print("All new files fit into their old slots, overwriting them in place.")
+                self.write_in_place(headers, new_files)
 
-        if byte_ptr.get_remaining_bytes_amount() < 80:
-            break
+            else:
+                print("Rebuilding PAK file...")
+                self.rebuild(headers, new_files, pak_size)
+
+        except Exception as exception:
+            print("[Error] Error writing PAK file:", exception)
+            return False
+
+        for i in new_files:
+            print(f"Replaced: {headers[i][1].file_name}")
+
+        return True
+
+
+    def write_in_place(self, headers: list[tuple[int, FileHeader]], new_files: dict[int, Path]) -> None:
+        pak_fd = os.open(self.pak_path, os.O_RDWR)
+        try:
+            for i, new_file_path in new_files.items():
+                header_pos, file_header = headers[i]
+                new_data = read_file(new_file_path)
+                capacity = file_header.next_header_offset - file_header.relative_file_offset
+                os.pwrite(pak_fd, new_data + b"\x00" * (capacity - len(new_data)), header_pos + file_header.relative_file_offset)
+                # file_size follows the 64 byte name and the relative offset
+                os.pwrite(pak_fd, struct.pack("<i", len(new_data)), header_pos + 68)
+
+        finally:
+            os.close(pak_fd)
+
+
+    def rebuild(self, headers: list[tuple[int, FileHeader]], new_files: dict[int, Path], pak_size: int) -> None:
+        alignment = get_pak_alignment(headers)
+        temp_path = self.pak_path.with_name(self.pak_path.name + ".tmp")
+        try:
+            src_fd = os.open(self.pak_path, os.O_RDONLY)
+            try:
+                dst_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    dst_pos = 0
+                    for i, (header_pos, file_header) in enumerate(headers):
+                        payload_pos = header_pos + file_header.relative_file_offset
+                        if i in new_files:
+                            file_size = new_files[i].stat().st_size
+
+                        else:
+                            file_size = file_header.file_size
+
+                        next_header_offset = align(file_header.relative_file_offset + file_size, alignment)
+
+                        # Everything between the header fields and the payload is kept as it is
+                        copy_file_range(src_fd, dst_fd, header_pos, file_header.relative_file_offset, dst_pos)
+                        os.pwrite(dst_fd, struct.pack("<iii", file_header.relative_file_offset, file_size, next_header_offset), dst_pos + 64)
+
+                        if i in new_files:
+                            new_fd = os.open(new_files[i], os.O_RDONLY)
+                            try:
+                                copy_file_range(new_fd, dst_fd, 0, file_size, dst_pos + file_header.relative_file_offset)
+
+                            finally:
+                                os.close(new_fd)
+
+                        else:
+                            copy_file_range(src_fd, dst_fd, payload_pos, file_size, dst_pos + file_header.relative_file_offset)
+
+                        dst_pos += next_header_offset
+
+                    # The closing header and anything behind the chain is copied unchanged
+                    if headers:
+                        last_header_pos, last_file_header = headers[-1]
+                        tail_pos = last_header_pos + last_file_header.next_header_offset
+
+                    else:
+                        tail_pos = 0
+
+                    copy_file_range(src_fd, dst_fd, tail_pos, pak_size - tail_pos, dst_pos)
+                    os.ftruncate(dst_fd, dst_pos + max(pak_size - tail_pos, 0))
+
+                finally:
+                    os.close(dst_fd)
+
+            finally:
+                os.close(src_fd)
+
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        os.replace(temp_path, self.pak_path)
+
+
+def get_output_path(destination_folder: Path, file_name: str) -> Path:
+    # Names may contain subfolders, PakBuilder writes them for nested source folders
+    relative_path = Path(file_name.replace("\\", "/").lstrip("/"))
+    if ".." in relative_path.parts:
+        raise ValueError(f"Invalid filename '{file_name}' in PAK!")
+
+    output_path = destination_folder / relative_path
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    return output_path
+
+
+def process_batch_entry(command: str, pak_path: Path, destination_folder: Path | None) -> tuple[int, int, list[tuple[str, int]], str | None]:
+    # Runs in a worker process, so errors are handed back instead of raised
+    file_count = 0
+    byte_count = 0
+    listing = []
+    try:
+        with PakArchive(pak_path).load() as pak_archive:
+            if command == "list":
+                listing = [(file_header.file_name, file_header.file_size) for _, file_header in pak_archive.headers]
+                file_count = len(listing)
+                byte_count = sum(file_size for _, file_size in listing)
+
+            else:
+                destination_folder.mkdir(parents=True, exist_ok=True)
+                for header_pos, file_header in pak_archive.headers:
+                    with open(get_output_path(destination_folder, file_header.file_name), "wb") as file:
+                        copy_file_range(pak_archive.pak_fd, file.fileno(), header_pos + file_header.relative_file_offset, file_header.file_size)
+
+                    file_count += 1
+                    byte_count += file_header.file_size
+
+    except Exception as exception:
+        return file_count, byte_count, listing, str(exception)
+
+    return file_count, byte_count, listing, None
+
+
+class BatchProcessing:
+    def __init__(self, command: str, source_folder: Path, destination_folder: Path | None = None, workers: int = None):
+        self.command = command
+        self.source_folder = source_folder
+        self.destination_folder = destination_folder
+        self.workers = workers or os.cpu_count() or 1
+
+
+    def collect_files(self) -> list[Path]:
+        return sorted(
+            path for path in self.source_folder.rglob("*")
+            if path.is_file() and is_known_pak_file(path)
+        )
+
+
+    def perform(self) -> bool:
+        if not self.source_folder.is_dir():
+            print("[Error] Source folder not found!")
+            return False
+
+        pak_paths = self.collect_files()
+        print(f"Found {len(pak_paths)} containers, processing them with {self.workers} workers...")
+
+        # Every container is extracted into a folder named like the container
+        if self.command == "extract":
+            destination_folders = [self.destination_folder / path.relative_to(self.source_folder) for path in pak_paths]
+
+        else:
+            destination_folders = [None] * len(pak_paths)
+
+        file_count = 0
+        byte_count = 0
+        failures = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(
+                process_batch_entry, [self.command] * len(pak_paths), pak_paths, destination_folders, chunksize=16
+            )
+            for pak_path, (pak_file_count, pak_byte_count, listing, error) in zip(pak_paths, results):
+                if error is not None:
+                    print(f"[Error] {pak_path}: {error}")
+                    failures.append(pak_path)
+                    continue
+
+                if self.command == "list":
+                    for file_name, file_size in listing:
+                        print(f"{pak_path}: {file_name} {file_size} bytes")
+
+                else:
+                    print(f"Extracted: {pak_path} ({pak_file_count} files)")
+
+                file_count += pak_file_count
+                byte_count += pak_byte_count
+
+        print(f"Containers: {len(pak_paths) - len(failures)} processed, {len(failures)} failed")
+        print(f"Files: {file_count}, bytes: {byte_count}")
+        for pak_path in failures:
+            print(f"Failed: {pak_path}")
+
+        return not failures
+
+
+class PakBuilder:
+    def __init__(self, pak_path: Path, source_folder_path: Path = None, manifest_path: Path = None, template_pak_path: Path = None,
+                 version: int = 0, alignment: int = DEFAULT_PAK_ALIGNMENT):
+        self.pak_path = pak_path
+        self.source_folder_path = source_folder_path
+        self.manifest_path = manifest_path
+        self.template_pak_path = template_pak_path
+        self.version = version
+        self.alignment = alignment
+
+
+    def collect_files(self) -> list[tuple[str, Path]]:
+        files = []
+        for root, dirs, filenames in os.walk(self.source_folder_path):
+            dirs.sort()
+            relative_root = Path(root).relative_to(self.source_folder_path)
+            for filename in sorted(filenames):
+                files.append(((relative_root / filename).as_posix(), Path(root, filename)))
+
+        return files
+
+
+    def load_manifest(self) -> list[tuple[str, Path]]:
+        # One "name in PAK<TAB>local file" pair per line, local paths are relative to the manifest
+        files = []
+        for line in read_file(self.manifest_path).decode("utf-8").splitlines():
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+
+            if "\t" in line:
+                file_name, file_path = line.split("\t", 1)
+
+            else:
+                file_name, file_path = line.split(None, 1)
+
+            files.append((file_name.strip(), self.manifest_path.parent / file_path.strip()))
+
+        return files
+
+
+    def perform(self) -> bool:
+        try:
+            if self.manifest_path is not None:
+                files = self.load_manifest()
+
+            elif self.source_folder_path is not None and self.source_folder_path.is_dir():
+                files = self.collect_files()
+
+            else:
+                print("[Error] Source folder not found!")
+                return False
+
+        except (OSError, ValueError) as exception:
+            print("[Error] Could not read manifest!", exception)
+            return False
+
+        versions = {}
+        if self.template_pak_path is not None:
+            if not self.template_pak_path.is_file():
+                print("[Error] Template PAK file not found!")
+                return False
+
+            # Order, versions and alignment are taken over from the template, new files go to the end
+            with PakArchive(self.template_pak_path).load() as template:
+                versions = {file_header.file_name: file_header.version for _, file_header in template.headers}
+                if template.headers:
+                    self.version = template.headers[0][1].version
+                    self.alignment = get_pak_alignment(template.headers)
+
+            template_order = {file_name: i for i, file_name in enumerate(versions)}
+            files.sort(key=lambda file: template_order.get(file[0], len(template_order)))
+
+        for file_name, file_path in files:
+            if not file_path.is_file():
+                print(f"[Error] File '{file_path}' not found!")
+                return False
+
+            try:
+                encoded_name = file_name.encode("shift-jis")
+
+            except UnicodeEncodeError:
+                print(f"[Error] Filename '{file_name}' cannot be encoded as Shift-JIS!")
+                return False
+
+            # The name needs a terminating zero inside its 64 bytes
+            if len(encoded_name) >= FILE_NAME_SIZE:
+                print(f"[Error] Filename '{file_name}' is too long!")
+                return False
+
+        temp_path = self.pak_path.with_name(self.pak_path.name + ".tmp")
+        try:
+            pak_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                pak_size = 0
+                for file_name, file_path in files:
+                    file_size = file_path.stat().st_size
+                    next_header_offset = align(FILE_HEADER_SIZE + file_size, self.alignment)
+                    os.pwrite(pak_fd, struct.pack(
+                        "<64siiii", file_name.encode("shift-jis"), FILE_HEADER_SIZE, file_size, next_header_offset,
+                        versions.get(file_name, self.version)
+                    ), pak_size)
+
+                    source_fd = os.open(file_path, os.O_RDONLY)
+                    try:
+                        copy_file_range(source_fd, pak_fd, 0, file_size, pak_size + FILE_HEADER_SIZE)
+
+                    finally:
+                        os.close(source_fd)
+
+                    pak_size += next_header_offset
+
+                # The chain is closed by an empty header, padding and the header are zero filled
+                os.ftruncate(pak_fd, pak_size + FILE_HEADER_SIZE)
+
+            finally:
+                os.close(pak_fd)
+
+            os.replace(temp_path, self.pak_path)
+
+        except Exception as exception:
+            temp_path.unlink(missing_ok=True)
+            print("[Error] Error writing PAK file:", exception)
+            return False
+
+        print(f"Written {len(files)} files.")
+        return True
 
 
 if __name__ == "__main__":
@@ -88,10 +595,25 @@ if __name__ == "__main__":
 
     replace_parser.add_argument("target_filename", type=str, help="Filename inside PAK to replace.")
     replace_parser.add_argument("new_file", type=str, help="Path to the new file to insert.")
+    replace_parser.add_argument("more", nargs="*", help="Further 'target_filename new_file' pairs to replace in the same pass.")
 
     list_parser = subparsers.add_parser("list", help="List filenames in the HD6 file.")
     list_parser.add_argument("pak_path", type=str, help="Path to the PAK file.")
 
+    create_parser = subparsers.add_parser("create", help="Create a new PAK file from a folder or manifest.")
+    create_parser.add_argument("pak_path", type=str, help="Path of the PAK file to create.")
+    create_parser.add_argument("source", type=str, help="Folder with the files to pack, or a manifest with --manifest.")
+    create_parser.add_argument("--manifest", action="store_true", help="Treat source as a manifest with one 'name<TAB>file' pair per line.")
+    create_parser.add_argument("--like", type=str, default=None, help="Existing PAK file to take the version, alignment and order from.")
+    create_parser.add_argument("--version", type=int, default=0, help="Version written into every header (default: 0).")
+    create_parser.add_argument("--alignment", type=int, default=DEFAULT_PAK_ALIGNMENT, help="Alignment of the headers (default: 16).")
+
+    batch_parser = subparsers.add_parser("batch", help="Extract or list every PAK file in a folder tree.")
+    batch_parser.add_argument("action", choices=["extract", "list"], help="What to do with every container.")
+    batch_parser.add_argument("source_folder", type=str, help="Folder to search for PAK files.")
+    batch_parser.add_argument("destination_folder", type=str, nargs="?", help="Destination folder for extracted files.")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+
     args = parser.parse_args()
 
     if args.command == "extract":
@@ -101,22 +623,69 @@ if __name__ == "__main__":
 
         def extract_file(byte_ptr: BytePtr, file_header: FileHeader):
             file_data = FileData(byte_ptr, file_header.file_size)
-            dest_file_path = Path(target_path, file_header.file_name)
+            dest_file_path = get_output_path(target_path, file_header.file_name)
             with open(dest_file_path, "wb") as file:
                 file.write(file_data.load())
 
             print("Written:", dest_file_path, file_header.file_size, "bytes")
 
 
-        process_pak_file(args.pak_path, extract_file)
+        try:
+            process_pak_file(args.pak_path, extract_file)
+
+        except ValueError as exception:
+            print("[Error]", exception)
 
 
     elif args.command == "replace":
-        print("Not implemented yet")
+        if len(args.more) % 2 != 0:
+            print("[Error] Every target filename needs a new file!")
 
-    elif args.command == "list":
-        def list_file(byte_ptr: BytePtr, file_header: FileHeader):
-            print(file_header.file_name, file_header.file_size, "bytes")
+        else:
+            pairs = [args.target_filename, args.new_file] + args.more
+            replacements = [(pairs[i], Path(pairs[i + 1])) for i in range(0, len(pairs), 2)]
+            replacer = PakReplacement(Path(args.pak_path), replacements)
+            if replacer.perform():
+                print("Replacement successful!")
 
+            else:
+                print("[Error] Replacement failed!")
 
-        process_pak_file(args.pak_path, list_file)
\ No newline at end of file
+    elif args.command == "list":
+        pak_archive = open_pak_file(args.pak_path)
+        if pak_archive is not None:
+            with pak_archive:
+                for _, file_header in pak_archive.headers:
+                    print(file_header.file_name, file_header.file_size, "bytes")
+
+    elif args.command == "batch":
+        if args.action == "extract" and args.destination_folder is None:
+            print("[Error] Extracting needs a destination folder!")
+
+        else:
+            destination_folder = Path(args.destination_folder) if args.destination_folder else None
+            batch = BatchProcessing(args.action, Path(args.source_folder), destination_folder, args.workers)
+            if batch.perform():
+                print("Batch processing successful!")
+
+            else:
+                print("[Error] Batch processing failed!")
+
+    elif args.command == "create":
+        if args.alignment <= 0 or args.alignment & (args.alignment - 1) != 0:
+            print("[Error] Alignment has to be a power of two!")
+
+        else:
+            builder = PakBuilder(
+                Path(args.pak_path),
+                source_folder_path=None if args.manifest else Path(args.source),
+                manifest_path=Path(args.source) if args.manifest else None,
+                template_pak_path=Path(args.like) if args.like else None,
+                version=args.version,
+                alignment=args.alignment
+            )
+            if builder.perform():
+                print("Creation successful!")
+
+            else:
+                print("[Error] Creation failed!")
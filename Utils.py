@@ -1,3 +1,6 @@
+import mmap
+import os
+
 from enum import Enum
 from pathlib import Path
 
@@ -5,7 +8,116 @@ from pathlib import Path
 def read_file(file_path: Path) -> bytes:
     with open(file_path, "rb") as f:
         return f.read()
-    
+
+
+def read_data_file(data_dir, *path_parts: str) -> bytes:
+    # data_dir is either an extracted data folder or an opened archive like HD6Tools.HD6Archive
+    if hasattr(data_dir, "read"):
+        return data_dir.read(os.path.join(*path_parts))
+
+    return read_file(Path(data_dir, *path_parts))
+
+
+def copy_file_range(src_fd: int, dst_fd: int, src_offset: int, size: int, dst_offset: int = 0, chunk_size: int = 0x100000) -> None:
+    # Let the kernel move the data where possible, the bytes never enter Python then
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                count = os.copy_file_range(src_fd, dst_fd, size - copied, src_offset + copied, dst_offset + copied)
+                if count == 0:
+                    return
+
+                copied += count
+
+            return
+
+        except OSError:
+            pass
+
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+            while copied < size:
+                count = os.sendfile(dst_fd, src_fd, src_offset + copied, size - copied)
+                if count == 0:
+                    return
+
+                copied += count
+
+            return
+
+        except OSError:
+            pass
+
+    while copied < size:
+        chunk = os.pread(src_fd, min(size - copied, chunk_size), src_offset + copied)
+        if not chunk:
+            return
+
+        os.pwrite(dst_fd, chunk, dst_offset + copied)
+        copied += len(chunk)
+
+
+class MappedFile:
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+
+        self.file = None
+        self.mapping = None
+        self.view = memoryview(b"")
+
+
+    def open(self) -> "MappedFile":
+        self.file = open(self.file_path, "rb")
+        # mmap refuses empty files, those simply get an empty view
+        if os.fstat(self.file.fileno()).st_size > 0:
+            self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.mapping)
+
+        return self
+
+
+    def close(self) -> None:
+        self.view.release()
+        self.view = memoryview(b"")
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+
+            except BufferError:
+                # Views handed out are still alive, the mapping is unmapped once the last one is gone
+                pass
+
+            self.mapping = None
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def get_view(self, offset: int, size: int) -> memoryview:
+        return self.view[offset:offset + size]
+
+
+    def release(self, offset: int, size: int) -> None:
+        # Drop already consumed pages so the resident size does not grow with the file
+        if self.mapping is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+
+        start = offset - offset % mmap.PAGESIZE
+        end = min(offset + size, len(self.mapping))
+        if end > start:
+            self.mapping.madvise(mmap.MADV_DONTNEED, start, end - start)
+
 
 def fix_umlaute(text: str) -> str:
     text = text.replace("<:a>", "ä")
@@ -1,12 +1,9 @@
-from BinaryUtils import BytePtr
+from BinarySchema import Record, Schema
 
 
-class VersionInfo:
-    def __init__(self, byte_ptr: BytePtr):
-        self.ptr = byte_ptr
-    
-
-    def load(self):
-        self.version = self.ptr.get_string(8)
-        self.created_date_time = self.ptr.get_string(20)
-        self.ptr.pos += 4
\ No newline at end of file
+class VersionInfo(Record):
+    SCHEMA = Schema([
+        ("version", "string", 8),
+        ("created_date_time", "string", 20),
+        (None, "padding", 4)
+    ])
\ No newline at end of file
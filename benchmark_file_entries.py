@@ -0,0 +1,99 @@
+import argparse
+import random
+import struct
+import sys
+import time
+
+from array import array
+
+from BinaryUtils import BytePtr
+from HD6Tools import HD6Extractor
+
+
+def uint24_to_int(bytes_array: bytes) -> int:
+    # Helper of the previous decoding, HD6Tools no longer needs it
+    return (bytes_array[0] & 0xFF) | ((bytes_array[1] & 0xFF) << 8) | ((bytes_array[2] & 0xFF) << 16)
+
+
+def build_file_entry_table(entry_count: int, seed: int) -> bytes:
+    # Random 16 bit name reference, 24 bit offset in 512 byte units and 24 bit size in 16 byte units
+    generator = random.Random(seed)
+    entry_struct = struct.Struct("<Q")
+    table = bytearray(entry_struct.size * entry_count)
+    for i in range(entry_count):
+        entry = generator.getrandbits(16) | (generator.getrandbits(24) << 16) | (generator.getrandbits(24) << 40)
+        entry_struct.pack_into(table, i * entry_struct.size, entry)
+
+    return bytes(table)
+
+
+def decode_per_entry(table: bytes, entry_count: int) -> tuple[list, list]:
+    # The previous decoding, one bytes object and one BytePtr per entry
+    ptr = BytePtr()
+    ptr.set_data(table)
+    file_entries = [ptr.get_bytes_array(8) for _ in range(entry_count)]
+
+    start_offset_array = []
+    file_size_array = []
+    for entry in file_entries:
+        ptr_entry = BytePtr()
+        ptr_entry.set_data(entry)
+        ptr_entry.skip(2)
+        bytes_array = ptr_entry.get_bytes_array(3)
+        start_offset_array.append((uint24_to_int(bytes_array) & 0xFFFFFC) << 9)
+
+        bytes_array = ptr_entry.get_bytes_array(3)
+        file_size_array.append(uint24_to_int(bytes_array) << 4)
+
+    return start_offset_array, file_size_array
+
+
+def decode_bulk(table: bytes, entry_count: int) -> tuple[array, array]:
+    # Same steps as HD6Extractor.load followed by parse_file_entries
+    hd6_extractor = HD6Extractor(None)
+    hd6_extractor.file_entries.frombytes(table[:8 * entry_count])
+    if sys.byteorder == "big":
+        hd6_extractor.file_entries.byteswap()
+
+    return hd6_extractor.parse_file_entries()
+
+
+def measure(function, table: bytes, entry_count: int, repeats: int) -> tuple[float, tuple]:
+    best_time = None
+    result = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function(table, entry_count)
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+
+    return best_time, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the per-entry HD6 file entry decoding with the bulk parse_file_entries on a synthetic table."
+    )
+    parser.add_argument("--entries", type=int, default=200000, help="Number of file entries in the synthetic table")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per decoder, the fastest one is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random entry values")
+    args = parser.parse_args()
+
+    if args.entries < 1 or args.repeats < 1:
+        print("[Error] --entries and --repeats must be at least 1")
+        sys.exit(1)
+
+    table = build_file_entry_table(args.entries, args.seed)
+
+    per_entry_time, (per_entry_offsets, per_entry_sizes) = measure(decode_per_entry, table, args.entries, args.repeats)
+    bulk_time, (bulk_offsets, bulk_sizes) = measure(decode_bulk, table, args.entries, args.repeats)
+
+    if per_entry_offsets != bulk_offsets.tolist() or per_entry_sizes != bulk_sizes.tolist():
+        print("[Error] The bulk decoding does not match the per-entry decoding")
+        sys.exit(1)
+
+    print(f"Entries:    {args.entries}")
+    print(f"Per-entry:  {per_entry_time * 1000:.1f} ms")
+    print(f"Bulk:       {bulk_time * 1000:.1f} ms")
+    print(f"Speedup:    {per_entry_time / bulk_time:.1f}x")
@@ -3,13 +3,10 @@ import argparse
 from pathlib import Path
 
 from MonsterParams import MonsterParams
-from Utils import read_file
-from BinaryUtils import BytePtr
-from MonsterParams import MonsterParamsFileHandler
 
 
 def set_monster_param(monster_params_obj, monster_id, field_name, value_str):
-    monster = next((monster_param for monster_param in monster_params_obj.monster_params if monster_param.monster_id == monster_id), None)
+    monster = monster_params_obj.get_monster_param_by_monster_id(monster_id)
     if not monster:
         print(f"[Error] Monster with ID {monster_id} not found.")
         return False
@@ -38,26 +35,15 @@ def set_monster_param(monster_params_obj, monster_id, field_name, value_str):
         print(f"[Error] Invalid value '{value_str}' for field '{field_name}'.")
         return False
 
-    setattr(monster, field_name, value)
+    monster_params_obj.set_monster_field(monster, field_name, value)
     print(f"Field '{field_name}' for Monster ID {monster_id} successfully changed to: {value}")
     return True
 
 
-def save_monster_params(data_dir, monster_params_obj, path_out="btl_monster_param_10_modified.bin"):
-    original_content = bytearray(read_file(Path(data_dir, "bin_ext", "btl_monster_param_10.bin")))
-    byte_ptr = BytePtr()
-    byte_ptr.set_data(original_content)
-
-    header = MonsterParamsFileHandler.BTL_MONSTER_PARAM_HEADER(byte_ptr)
-    header.load()
-    byte_ptr.pos = header.monster_param_offset
-
-    for param in monster_params_obj.monster_params:
-        param.ptr = byte_ptr
-        param.save()
-
+def save_monster_params(monster_params_obj, path_out="btl_monster_param_10_modified.bin"):
+    # Edits are written straight into the loaded file buffer, so it only has to be written out
     with open(path_out, "wb") as f:
-        f.write(original_content)
+        f.write(monster_params_obj.buffer)
 
     print(f"File successfully saved: {path_out}")
 
@@ -80,7 +66,7 @@ def main():
     if args.command == "set":
         success = set_monster_param(monster_params, args.monster_id, args.field, args.value)
         if success:
-            save_monster_params(args.data_dir, monster_params)
+            save_monster_params(monster_params)
 
 
 if __name__ == "__main__":